@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+from backend.common.utils.executor import ModelExecutor, PoolSaturatedError, model_executor
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests into one batched call.
+
+    Requests are collected until either `max_batch_rows` rows are pending or
+    `max_wait_ms` has passed since the first pending request. Pending requests
+    whose records carry the same keys are then concatenated, `predict_fn` runs
+    once per such group (off the event loop), and the result is sliced back to
+    each caller. Requests with different keys are never merged: a frame built
+    from the combined records would have the union of their columns, and a
+    request missing a column would be imputed instead of rejected.
+
+    `predict_fn(records)` must return either a per-row sequence or a tuple of
+    per-row sequences, e.g. `(predictions, probabilities)`. Any other value in
+    the result (such as a model version string) is passed to every caller as is.
+    Batches run on the shared model executor unless another one is given.
+    """
+    def __init__(self, predict_fn: Callable[[list], Any], max_wait_ms: float = 5.0, max_batch_rows: int = 256,
+                 executor: ModelExecutor = None):
+        if max_batch_rows < 1:
+            raise ValueError("max_batch_rows must be >= 1")
+        self.predict_fn = predict_fn
+        self.executor = executor or model_executor
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_rows = max_batch_rows
+
+        self._pending: List[Tuple[list, asyncio.Future]] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, records: list):
+        """
+        Queue `records` for the next batch and wait for this caller's slice of the result.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((records, future))
+        self._pending_rows += len(records)
+
+        if self._pending_rows >= self.max_batch_rows:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        groups = {}
+        for chunk, future in batch:
+            groups.setdefault(_key_set(chunk), []).append((chunk, future))
+        await asyncio.gather(*(self._run_group(group) for group in groups.values()))
+
+    async def _run_group(self, batch):
+        offsets, records, start = [], [], 0
+        for chunk, _ in batch:
+            records.extend(chunk)
+            offsets.append((start, start + len(chunk)))
+            start += len(chunk)
+
+        try:
+            result = await self._call(records)
+            parts = _split(result, offsets)
+        except PoolSaturatedError as e:
+            for _, future in batch:
+                _resolve(future, error=e)
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                _resolve(batch[0][1], error=e)
+                return
+            # A malformed payload must not fail its neighbours: score each request on its own
+            logger.warning(f"Batched prediction failed for {len(batch)} requests ({e}); retrying individually")
+            for chunk, future in batch:
+                try:
+                    _resolve(future, result=await self._call(chunk))
+                except Exception as single_error:
+                    _resolve(future, error=single_error)
+            return
+
+        for (_, future), part in zip(batch, parts):
+            _resolve(future, result=part)
+
+    async def _call(self, records):
+        return await self.executor.run(self.predict_fn, records)
+
+def _key_set(records):
+    """Columns a frame built from `records` would have; None for non-dict records."""
+    if not all(isinstance(record, dict) for record in records):
+        return None
+    return frozenset().union(*(record.keys() for record in records))
+
+def _split(result, offsets):
+    """Slices a batched result into one part per caller."""
+    if isinstance(result, tuple):
+        return [tuple(parts) for parts in zip(*(_split(item, offsets) for item in result))]
+    if isinstance(result, (str, bytes)) or not hasattr(result, '__getitem__'):
+        return [result] * len(offsets)
+    return [result[a:b] for a, b in offsets]
+
+def _resolve(future, result=None, error=None):
+    # The caller may have gone away (client disconnect cancels the request task)
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
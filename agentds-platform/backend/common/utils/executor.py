@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+DEFAULT_POOL_SIZE = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE_SIZE = 32
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the model executor already holds its maximum of running + queued jobs."""
+
+class ModelExecutor:
+    """
+    Bounded worker pool shared by every router for CPU-bound model work
+    (training, pipeline.predict), so handlers never block the event loop.
+
+    Threads are used because loaded models live in process memory and
+    sklearn/numpy release the GIL in their heavy loops. At most
+    `max_workers` jobs run at once and `max_queue` more may wait; beyond
+    that `run` raises PoolSaturatedError, which routers map to HTTP 429.
+
+    Sizes come from AGENTDS_MODEL_POOL_SIZE / AGENTDS_MODEL_QUEUE_SIZE.
+    """
+    def __init__(self, max_workers: int = None, max_queue: int = None):
+        self.max_workers = max_workers or int(os.getenv("AGENTDS_MODEL_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("AGENTDS_MODEL_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-worker")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool and await its result.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturatedError(
+                f"Model executor is saturated ({self.max_workers} running, {self.max_queue} queued)"
+            )
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+        # Release on completion of the work itself, not of the awaiting request:
+        # a cancelled request does not stop a job that is already running.
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+model_executor = ModelExecutor()
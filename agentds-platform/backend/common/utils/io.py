@@ -1,25 +1,122 @@
 import joblib
 import json
+import logging
 import os
+import pickle
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple, Union
 
-def save_artifact(obj: Any, path: Path):
-    """Saves a python object using joblib."""
+logger = logging.getLogger(__name__)
+
+Compression = Union[None, bool, int, str, Tuple[str, int]]
+
+def parse_compression(value: str) -> Compression:
+    """joblib `compress` argument from "3", "zlib", "lz4:3", ...; "" or "0" for none."""
+    value = value.strip().lower()
+    if value in ("", "0", "none", "false"):
+        return 0
+    method, _, level = value.partition(":")
+    if method.isdigit():
+        return int(method)
+    return (method, int(level)) if level else method
+
+def artifact_compression(compress: Compression = None) -> Compression:
+    """`compress` if given, else AGENTDS_ARTIFACT_COMPRESS, else no compression."""
+    if compress is not None:
+        return compress
+    return parse_compression(os.getenv("AGENTDS_ARTIFACT_COMPRESS", ""))
+
+def artifact_mmap_mode(mmap_mode: Optional[str] = None) -> Optional[str]:
+    """`mmap_mode` if given, else AGENTDS_ARTIFACT_MMAP ("r", "c"), else None."""
+    if mmap_mode is not None:
+        return mmap_mode or None
+    return os.getenv("AGENTDS_ARTIFACT_MMAP") or None
+
+def process_memory() -> Dict[str, float]:
+    """
+    Memory of this process in MB, from /proc on Linux: rss, its private
+    (anon) and file-backed (file) parts, and pss, which splits shared pages
+    between the processes mapping them. Empty elsewhere.
+    """
+    fields = {"VmRSS": "rss", "RssAnon": "anon", "RssFile": "file", "Pss": "pss"}
+    memory = {}
+    for source in ("/proc/self/status", "/proc/self/smaps_rollup"):
+        try:
+            with open(source) as f:
+                for line in f:
+                    key, _, value = line.partition(":")
+                    if key in fields and fields[key] not in memory:
+                        memory[fields[key]] = int(value.split()[0]) / 1024
+        except OSError:
+            pass
+    return memory
+
+def save_artifact(obj: Any, path: Path, compress: Compression = None) -> int:
+    """
+    Saves a python object using joblib and returns the file size in bytes.
+
+    Uncompressed (the default), NumPy arrays are written as raw, aligned
+    buffers that load_artifact can memory-map. `compress` (or
+    AGENTDS_ARTIFACT_COMPRESS) trades that for a smaller file, e.g. for
+    cold storage.
+    """
+    path = Path(path)
+    compress = artifact_compression(compress)
     path.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(obj, path)
+    # Write then rename, so a serving process never loads a half-written file;
+    # the pid keeps concurrent writers of the same artifact apart
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    joblib.dump(obj, tmp_path, compress=compress)
+    os.replace(tmp_path, path)
+    size = path.stat().st_size
+    logger.info(f"Saved {path} ({size / 1024**2:.1f} MB, compress={compress})")
+    return size
+
+def load_artifact(path: Path, mmap_mode: Optional[str] = None) -> Any:
+    """
+    Loads a python object using joblib.
 
-def load_artifact(path: Path) -> Any:
-    """Loads a python object using joblib."""
+    With `mmap_mode` (or AGENTDS_ARTIFACT_MMAP) set to "r", the NumPy arrays of
+    an uncompressed artifact are memory-mapped instead of read, so processes
+    loading the same file share its pages through the OS page cache. Objects
+    that copy their arrays when unpickled do not benefit: scikit-learn trees
+    rebuild their node arrays in private memory, so only plain-array models
+    such as a CompiledTreeEnsemble are actually shared. Compressed artifacts
+    are always read into memory.
+    """
+    path = Path(path)
     if not path.exists():
         raise FileNotFoundError(f"Artifact not found at {path}")
-    return joblib.load(path)
+    mmap_mode = artifact_mmap_mode(mmap_mode)
+    if mmap_mode is not None and _is_compressed(path):
+        logger.info(f"{path} is compressed and cannot be memory-mapped; reading it into memory")
+        mmap_mode = None
+
+    before = process_memory()
+    start = time.perf_counter()
+    obj = joblib.load(path, mmap_mode=mmap_mode)
+    elapsed = time.perf_counter() - start
+    after = process_memory()
+    rss = (f", rss {after['rss']:.0f} MB (+{after['rss'] - before['rss']:.0f} MB, "
+           f"{after.get('file', 0):.0f} MB file-backed)" if after and before else "")
+    logger.info(f"Loaded {path} ({path.stat().st_size / 1024**2:.1f} MB, mmap_mode={mmap_mode}) "
+                f"in {elapsed:.2f}s{rss}")
+    return obj
+
+def _is_compressed(path: Path) -> bool:
+    # An uncompressed joblib file is a pickle, which starts with the PROTO opcode;
+    # compressed ones start with their compressor's magic bytes
+    with open(path, "rb") as f:
+        return f.read(1) != pickle.PROTO
 
 def save_json(data: Dict, path: Path):
     """Saves a dictionary to JSON."""
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w") as f:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
         json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
 
 def load_json(path: Path) -> Dict:
     """Loads a dictionary from JSON."""
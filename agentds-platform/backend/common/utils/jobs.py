@@ -0,0 +1,182 @@
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class TrainingJob:
+    """
+    State of one background training run, as reported by GET /train/{job_id}.
+    """
+    def __init__(self, service: str):
+        self.job_id = uuid.uuid4().hex
+        self.service = service
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.stage = None
+        self.stages = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    @property
+    def elapsed_s(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "service": self.service,
+            "status": self.status,
+            "stage": self.stage,
+            "stages": self.stages,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "metrics": (self.result or {}).get("metrics"),
+            "result": self.result,
+            "error": self.error,
+        }
+
+def _run_training(train_fn: Callable, events) -> None:
+    """
+    Entry point of the training subprocess. Stage changes, the final result
+    and errors are sent back to the API process over `events`.
+    """
+    def progress(stage: str):
+        events.put(("stage", stage, time.time()))
+
+    try:
+        events.put(("result", train_fn(progress=progress)))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+class TrainingJobManager:
+    """
+    Runs train_model() functions in separate processes so the API stays responsive.
+
+    Only one job per service runs at a time: a train request that arrives while
+    a job for the same service is queued or running gets that job back
+    instead of starting a second concurrent fit.
+    """
+    def __init__(self, max_history: int = 100):
+        self.max_history = max_history
+        self._jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+        self._active: Dict[str, str] = {}
+        self._processes: Dict[str, mp.Process] = {}
+        self._callbacks: Dict[str, Callable[[TrainingJob], None]] = {}
+        self._lock = threading.Lock()
+        # spawn: the API process runs threads, which fork does not copy safely
+        self._ctx = mp.get_context("spawn")
+
+    def submit(self, service: str, train_fn: Callable,
+               on_success: Callable[[TrainingJob], None] = None) -> Tuple[TrainingJob, bool]:
+        """
+        Start training for `service` unless a job is already active.
+        Returns (job, created). `train_fn` must be an importable module-level
+        function accepting a `progress` callback. `on_success(job)` runs in the
+        API process once the job has succeeded, e.g. to reload the served model.
+        """
+        with self._lock:
+            active_id = self._active.get(service)
+            if active_id and self._jobs[active_id].is_active:
+                return self._jobs[active_id], False
+
+            job = TrainingJob(service)
+            self._jobs[job.job_id] = job
+            self._active[service] = job.job_id
+            if on_success is not None:
+                self._callbacks[job.job_id] = on_success
+            self._trim_history()
+
+        events = self._ctx.Queue()
+        process = self._ctx.Process(target=_run_training, args=(train_fn, events), name=f"train-{service}")
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            process.start()
+        except Exception as e:
+            self._finish(job, error=f"Could not start training process: {e}")
+            return job, True
+        self._processes[job.job_id] = process
+        threading.Thread(target=self._monitor, args=(job, process, events), daemon=True).start()
+        logger.info(f"Started training job {job.job_id} for {service} (pid {process.pid})")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def active_job(self, service: str) -> Optional[TrainingJob]:
+        job_id = self._active.get(service)
+        job = self._jobs.get(job_id) if job_id else None
+        return job if job is not None and job.is_active else None
+
+    def _monitor(self, job: TrainingJob, process: mp.Process, events) -> None:
+        while job.is_active:
+            try:
+                event = events.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    # Drain anything sent just before exit, then give up
+                    try:
+                        event = events.get(timeout=0.5)
+                    except queue.Empty:
+                        self._finish(job, error=f"Training process exited with code {process.exitcode}")
+                        break
+                else:
+                    continue
+
+            kind = event[0]
+            if kind == "stage":
+                job.stage = event[1]
+                job.stages.append({"stage": event[1], "at_s": round(event[2] - job.started_at, 3)})
+            elif kind == "result":
+                result = event[1]
+                if result.get("success"):
+                    self._finish(job, result=result)
+                else:
+                    self._finish(job, result=result, error=result.get("error") or "Training failed")
+            elif kind == "error":
+                self._finish(job, error=event[1])
+
+        process.join()
+        self._processes.pop(job.job_id, None)
+
+    def _finish(self, job: TrainingJob, result: dict = None, error: str = None) -> None:
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        job.status = "failed" if error else "succeeded"
+        log = logger.error if error else logger.info
+        log(f"Training job {job.job_id} for {job.service} {job.status} after {job.elapsed_s:.1f}s"
+            + (f": {error}" if error else ""))
+
+        callback = self._callbacks.pop(job.job_id, None)
+        if callback is not None and not error:
+            try:
+                callback(job)
+            except Exception as e:
+                logger.error(f"on_success callback for training job {job.job_id} failed: {e}")
+
+    def _trim_history(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if not j.is_active]
+        for job_id in finished[: max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Terminate running training processes (called on application shutdown)."""
+        for process in list(self._processes.values()):
+            if process.is_alive():
+                process.terminate()
+
+training_jobs = TrainingJobManager()
@@ -0,0 +1,83 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """
+    Services whose model artifacts are preloaded when the application starts.
+
+    A registered service provides `load_resources()` and may provide
+    `warmup()`, which runs one synthetic prediction and returns False if it
+    had nothing to warm up with. `preload_all()` loads every service in
+    parallel and records per-model timings for the readiness endpoint.
+    A service with an `is_loaded` property is checked live, so one that was
+    untrained at startup becomes ready once training loads its model.
+    """
+    def __init__(self):
+        self._services: Dict[str, object] = {}
+        self._status: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.preload_started = False
+        self.preload_complete = False
+
+    def register(self, name: str, service) -> None:
+        with self._lock:
+            self._services[name] = service
+            self._status[name] = {"loaded": False, "warmed_up": False, "load_s": None, "warmup_s": None, "error": None}
+
+    def preload_all(self, max_workers: int = None) -> Dict[str, dict]:
+        self.preload_started = True
+        start = time.perf_counter()
+        names = list(self._services)
+        with ThreadPoolExecutor(max_workers=max_workers or max(len(names), 1), thread_name_prefix="preload") as pool:
+            list(pool.map(self._preload, names))
+        self.preload_complete = True
+        loaded = sum(self._loaded(name) for name in names)
+        logger.info(f"Preloaded {loaded}/{len(names)} models in {time.perf_counter() - start:.2f}s")
+        return self.status()
+
+    def _preload(self, name: str) -> None:
+        service = self._services[name]
+        status = self._status[name]
+        try:
+            start = time.perf_counter()
+            service.load_resources()
+            status["load_s"] = round(time.perf_counter() - start, 3)
+            status["loaded"] = True
+
+            if hasattr(service, "warmup"):
+                start = time.perf_counter()
+                status["warmed_up"] = service.warmup() is not False
+                status["warmup_s"] = round(time.perf_counter() - start, 3)
+        except FileNotFoundError as e:
+            status["error"] = f"Not trained: {e}"
+            logger.warning(f"{name}: model not loaded ({e})")
+        except Exception as e:
+            status["error"] = f"{type(e).__name__}: {e}"
+            logger.error(f"{name}: preload failed: {e}")
+
+    def _loaded(self, name: str) -> bool:
+        service = self._services[name]
+        if hasattr(service, "is_loaded"):
+            return bool(service.is_loaded)
+        return self._status[name]["loaded"]
+
+    @property
+    def ready(self) -> bool:
+        return self.preload_complete and all(self._loaded(name) for name in self._status)
+
+    def status(self) -> Dict[str, dict]:
+        statuses = {}
+        for name, status in self._status.items():
+            status = dict(status, loaded=self._loaded(name))
+            if status["loaded"]:
+                # Loaded since startup, e.g. by a training job: the preload error is stale
+                status["error"] = None
+            statuses[name] = status
+        return statuses
+
+service_registry = ServiceRegistry()
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from backend.common.utils.io import load_artifact, load_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_INTERVAL_S = 2.0
+# Training writes the model first and metadata.json last; a model newer than its
+# metadata is treated as a save in progress for up to this long
+SAVE_SETTLE_S = 10.0
+
+def new_version() -> str:
+    """Version tag written into metadata.json by training runs."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+class ModelVersion(NamedTuple):
+    """One loaded model: the pipeline and metadata that were saved together."""
+    version: str
+    model: Any
+    metadata: Dict
+
+class VersionedModel:
+    """
+    Holds the currently served version of a model artifact and swaps in new
+    ones without a restart.
+
+    `get()` returns an immutable ModelVersion snapshot. A request keeps using
+    the snapshot it started with, so a reload never mixes the old pipeline
+    with the new metadata or cuts off an in-flight prediction.
+
+    Reloads happen when the artifact files change on disk (mtimes are checked
+    at most every `check_interval_s`, from AGENTDS_MODEL_CHECK_INTERVAL_S) or
+    when `refresh()` is called, e.g. after a training job succeeds. The new
+    artifacts are loaded on a background thread while the old version keeps
+    serving; only the very first load blocks.
+
+    `prepare(model)`, if given, turns every loaded artifact into the object
+    that is served, e.g. a compiled tree predictor. `mmap_mode` (default
+    AGENTDS_ARTIFACT_MMAP) memory-maps the artifact's arrays; see load_artifact.
+    """
+    def __init__(self, model_path: Path, metadata_path: Path, check_interval_s: float = None,
+                 prepare: Callable[[Any], Any] = None, mmap_mode: Optional[str] = None):
+        self.model_path = Path(model_path)
+        self.metadata_path = Path(metadata_path)
+        self.prepare = prepare
+        self.mmap_mode = mmap_mode
+        self.check_interval_s = (check_interval_s if check_interval_s is not None
+                                 else float(os.getenv("AGENTDS_MODEL_CHECK_INTERVAL_S", DEFAULT_CHECK_INTERVAL_S)))
+
+        self._current: Optional[ModelVersion] = None
+        self._signature: Optional[Tuple] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._reloading = False
+
+    def get(self) -> ModelVersion:
+        """
+        Return the current version, loading it on first use.
+        Raises FileNotFoundError if the model has never been trained.
+        """
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._load()
+                return self._current
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval_s:
+            self._last_check = now
+            if self._disk_signature() != self._signature:
+                self.refresh()
+        return current
+
+    @property
+    def version(self) -> Optional[str]:
+        current = self._current
+        return current.version if current is not None else None
+
+    def refresh(self, wait: bool = False) -> None:
+        """
+        Reload the artifacts in the background if they changed on disk.
+        With `wait=True` the reload runs in the calling thread.
+        """
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        if wait:
+            self._reload()
+        else:
+            threading.Thread(target=self._reload, name=f"reload-{self.model_path.parent.name}", daemon=True).start()
+
+    def _reload(self) -> None:
+        try:
+            signature = self._disk_signature()
+            if signature == self._signature or _save_in_progress(signature):
+                return
+            previous = self.version
+            self._load()
+            logger.info(f"Reloaded {self.model_path}: {previous} -> {self.version}")
+        except Exception as e:
+            # Keep serving the previous version; the next check retries
+            logger.error(f"Reloading {self.model_path} failed: {e}")
+        finally:
+            self._reloading = False
+
+    def _load(self) -> None:
+        signature = self._disk_signature()
+        model = load_artifact(self.model_path, mmap_mode=self.mmap_mode)
+        if self.prepare is not None:
+            model = self.prepare(model)
+        metadata = load_json(self.metadata_path)
+        version = metadata.get("version") or f"mtime-{int(signature[0])}"
+        # Single reference assignment: readers see either the old or the new snapshot
+        self._current = ModelVersion(version, model, metadata)
+        self._signature = signature
+        self._last_check = time.monotonic()
+
+    def _disk_signature(self) -> Optional[Tuple]:
+        try:
+            return (self.model_path.stat().st_mtime, self.metadata_path.stat().st_mtime)
+        except FileNotFoundError:
+            return None
+
+def _save_in_progress(signature: Optional[Tuple]) -> bool:
+    if signature is None:
+        return False
+    model_mtime, metadata_mtime = signature
+    return metadata_mtime < model_mtime and time.time() - model_mtime < SAVE_SETTLE_S
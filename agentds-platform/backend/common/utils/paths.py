@@ -10,3 +10,12 @@ def get_project_root() -> Path:
 def get_artifacts_path(domain: str, ps: str) -> Path:
     """Returns the artifacts path for a specific problem statement."""
     return get_project_root() / "backend" / domain / ps / "model" / "artifacts"
+
+def get_data_cache_path(domain: str) -> Path:
+    """
+    Returns the local dataset cache directory for a domain.
+    AGENTDS_DATA_CACHE_DIR points it elsewhere, e.g. at a pre-seeded copy on offline hosts.
+    """
+    root = os.getenv("AGENTDS_DATA_CACHE_DIR")
+    base = Path(root) if root else get_project_root() / "data_cache"
+    return base / domain
@@ -0,0 +1,460 @@
+import copy
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from backend.common.utils.io import artifact_mmap_mode, load_artifact, save_artifact
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("sklearn", "compiled")
+# Above this many rows per call the library's own (multi-threaded, C++) predictor
+# is faster than array traversal; see
+# backend/insurance/claims_complexity/benchmarks/bench_tree_inference.py
+DEFAULT_COMPILED_MAX_ROWS = 32
+# Rows per traversal block; bounds the (rows x trees) node-index matrix
+BLOCK_NODES = 1 << 18
+# LightGBM treats |x| <= kZeroThreshold as zero for missing_type=Zero
+LGBM_ZERO_THRESHOLD = 1e-35
+
+class CompiledTreeEnsemble:
+    """
+    Array-based predictor for a fitted tree ensemble.
+
+    Every tree is flattened into shared node arrays (feature, threshold,
+    left/right child, missing-value routing and leaf value). Prediction walks
+    all rows through all trees at once with NumPy gathers, one step per tree
+    level, instead of going through the library's per-call Python and
+    validation overhead. Each step only carries the (row, tree) pairs that
+    have not reached a leaf yet, so deep, unbalanced trees (LightGBM grows
+    leaf-wise) cost what their actual paths cost.
+
+    This wins on the small batches of online serving, where the library's
+    fixed per-call cost dominates; on large batches the library's compiled
+    loops are faster. With a `fallback` model, calls with more than
+    `max_rows` rows are delegated to it.
+
+    Built with `compile_model()` from a sklearn RandomForest/ExtraTrees
+    classifier or regressor, an XGBClassifier or an LGBMClassifier. Node
+    tests, input dtypes and the order in which tree outputs are summed
+    follow each library, so labels match the original model and
+    probabilities agree with it to the last bits of float rounding (~1e-7
+    for XGBoost, which works in float32).
+    """
+    def __init__(self, trees: List[Dict[str, np.ndarray]], kind: str, input_dtype, strict: bool,
+                 absent_is_missing: bool = False, groups: np.ndarray = None, base_margin: np.ndarray = None,
+                 link: str = None, sigmoid: float = 1.0, classes: np.ndarray = None, n_features: int = None,
+                 missing_value: float = np.nan):
+        self.kind = kind                      # 'forest' (averaged leaf vectors) or 'boosted' (summed margins)
+        self.input_dtype = np.dtype(input_dtype)
+        self.strict = strict                  # XGBoost goes left on x < t, sklearn and LightGBM on x <= t
+        self.absent_is_missing = absent_is_missing
+        self.missing_value = missing_value
+        self.groups = groups
+        self.base_margin = base_margin
+        self.link = link
+        self.sigmoid = sigmoid
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        self.n_trees_ = len(trees)
+        self.fallback = None
+        self.max_rows = None
+
+        sizes = [len(tree["feature"]) for tree in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        self.roots_ = offsets
+        self.feature_ = np.concatenate([tree["feature"] for tree in trees]).astype(np.int32)
+        self.threshold_ = np.concatenate([tree["threshold"] for tree in trees])
+        self.left_ = np.concatenate([tree["left"] + offset for tree, offset in zip(trees, offsets)]).astype(np.int32)
+        self.right_ = np.concatenate([tree["right"] + offset for tree, offset in zip(trees, offsets)]).astype(np.int32)
+        self.is_leaf_ = self.left_ == np.arange(len(self.left_))
+        # children_[2 * node] is the left child, children_[2 * node + 1] the right one
+        self.children_ = np.column_stack([self.left_, self.right_]).ravel()
+        self.default_left_ = np.concatenate([tree["default_left"] for tree in trees]).astype(bool)
+        self.nan_as_zero_ = np.concatenate([tree.get("nan_as_zero", np.zeros(size, bool))
+                                            for tree, size in zip(trees, sizes)]).astype(bool)
+        self.zero_missing_ = np.concatenate([tree.get("zero_missing", np.zeros(size, bool))
+                                             for tree, size in zip(trees, sizes)]).astype(bool)
+        self.value_ = np.concatenate([tree["value"] for tree in trees])
+        self.depth_ = max(_max_depth(tree["left"], tree["right"]) for tree in trees)
+        self._lgbm_missing = bool(self.nan_as_zero_.any() or self.zero_missing_.any())
+        self._group_trees = ([np.flatnonzero(groups == group) for group in range(len(base_margin))]
+                             if kind == "boosted" else None)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature_)
+
+    def with_fallback(self, model, max_rows: int) -> "CompiledTreeEnsemble":
+        """Copy that hands batches larger than `max_rows` to `model`."""
+        hybrid = copy.copy(self)
+        hybrid.fallback, hybrid.max_rows = model, max_rows
+        return hybrid
+
+    # Enough of the estimator protocol for a compiled model to end a fitted Pipeline;
+    # it has no constructor parameters, so it cannot be cloned or refitted
+    def fit(self, X, y=None):
+        raise TypeError("A compiled ensemble is built from a fitted model; refit the original model instead")
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    def __sklearn_tags__(self):
+        # Read by scikit-learn >= 1.6 when a Pipeline checks that its steps are fitted
+        from sklearn.utils import ClassifierTags, RegressorTags, Tags, TargetTags
+
+        classifier = self.classes_ is not None
+        return Tags(estimator_type="classifier" if classifier else "regressor",
+                    target_tags=TargetTags(required=True),
+                    classifier_tags=ClassifierTags() if classifier else None,
+                    regressor_tags=None if classifier else RegressorTags())
+
+    def __repr__(self):
+        return f"{type(self).__name__}(kind={self.kind!r}, n_trees={self.n_trees_})"
+
+    def predict_proba(self, X):
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        if self._use_fallback(X):
+            return self.fallback.predict_proba(X)
+        return self._predict(X)
+
+    def predict(self, X):
+        if self.classes_ is None:
+            return self.fallback.predict(X) if self._use_fallback(X) else self._predict(X)
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def _use_fallback(self, X) -> bool:
+        return self.fallback is not None and X.shape[0] > self.max_rows
+
+    def _block_rows(self) -> int:
+        return max(1, BLOCK_NODES // self.n_trees_)
+
+    def _predict(self, X):
+        X = self._prepare(X)
+        block = self._block_rows()
+        if len(X) <= block:
+            return self._output(self._leaves(X))
+        return np.concatenate([self._output(self._leaves(X[start:start + block]))
+                               for start in range(0, len(X), block)])
+
+    def _prepare(self, X) -> np.ndarray:
+        if sparse.issparse(X):
+            X = X.tocsr()
+            if self.absent_is_missing:
+                # XGBoost treats entries absent from a sparse matrix as missing, not as zero
+                dense = np.full(X.shape, np.nan, dtype=self.input_dtype)
+                rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+                dense[rows, X.indices] = X.data
+                X = dense
+            else:
+                X = X.toarray()
+        elif isinstance(X, pd.DataFrame):
+            X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2D feature matrix, got shape {X.shape}")
+        if self.n_features_in_ is not None and X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}")
+        if not np.isnan(self.missing_value):
+            X = np.where(X == self.missing_value, np.nan, X)
+        return X
+
+    def _leaves(self, X) -> np.ndarray:
+        """Leaf reached in every tree, shape (n_rows, n_trees), as global node indices."""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        leaves = np.empty(n_rows * self.n_trees_, dtype=np.int32)
+        # One entry per (row, tree) pair still walking down
+        node = np.tile(self.roots_, n_rows)
+        position = np.arange(n_rows * self.n_trees_, dtype=np.int32)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees_)
+
+        for _ in range(self.depth_ + 1):
+            done = self.is_leaf_[node]
+            n_done = np.count_nonzero(done)
+            if n_done == len(node):
+                leaves[position] = node
+                break
+            if n_done * 4 > len(node):
+                # Drop finished pairs once there are enough of them; until then
+                # leaves just point to themselves
+                leaves[position[done]] = node[done]
+                walking = ~done
+                node, position, row_offset = node[walking], position[walking], row_offset[walking]
+
+            x = flat_X[row_offset + self.feature_[node]]
+            if self._lgbm_missing:
+                x = np.where(np.isnan(x) & self.nan_as_zero_[node], 0.0, x)
+            threshold = self.threshold_[node]
+            go_right = (x >= threshold) if self.strict else (x > threshold)
+            missing = np.isnan(x)
+            if self._lgbm_missing:
+                missing |= self.zero_missing_[node] & (np.abs(x) <= LGBM_ZERO_THRESHOLD)
+            if missing.any():
+                go_right[missing] = ~self.default_left_[node[missing]]
+            node = self.children_[2 * node + go_right]
+        return leaves.reshape(n_rows, self.n_trees_)
+
+    def _output(self, leaves):
+        values = self.value_[leaves]
+        if self.kind == "forest":
+            # Summed tree by tree, then averaged, exactly as sklearn's forests do
+            total = np.cumsum(values, axis=1)[:, -1]
+            return total / self.n_trees_
+
+        n_groups = len(self.base_margin)
+        margin = np.empty((len(leaves), n_groups), dtype=self.value_.dtype)
+        for group, group_trees in enumerate(self._group_trees):
+            # Start from the base margin and add trees in order, in the library's precision
+            per_tree = values[:, group_trees]
+            start = np.full((len(leaves), 1), self.base_margin[group], dtype=self.value_.dtype)
+            margin[:, group] = np.cumsum(np.hstack([start, per_tree]), axis=1, dtype=self.value_.dtype)[:, -1]
+
+        if self.link == "softmax":
+            exp = np.exp(margin - margin.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if self.link == "sigmoid":
+            positive = 1 / (1 + np.exp(-self.sigmoid * margin[:, 0]))
+            return np.column_stack([1 - positive, positive])
+        return margin[:, 0] if n_groups == 1 else margin
+
+def compile_model(model, max_rows: int = None):
+    """
+    Compiled copy of `model` for inference.
+
+    Tree ensembles are compiled directly. A Pipeline keeps its preprocessing
+    steps and gets its final tree model compiled; a soft VotingClassifier,
+    or any model with a `map_estimators(fn)` method, gets its base learners
+    compiled. Raises TypeError for anything else. With `max_rows`, each
+    compiled model keeps the original for batches larger than that.
+    """
+    from sklearn.pipeline import Pipeline
+    from sklearn.ensemble import VotingClassifier
+
+    if isinstance(model, Pipeline):
+        name, final = model.steps[-1]
+        return Pipeline(model.steps[:-1] + [(name, compile_model(final, max_rows))])
+    if isinstance(model, VotingClassifier):
+        if model.voting != "soft":
+            raise TypeError("Only soft-voting ensembles can be compiled")
+        compiled = copy.copy(model)
+        compiled.estimators_ = [compile_model(estimator, max_rows) for estimator in model.estimators_]
+        return compiled
+    if hasattr(model, "map_estimators"):
+        return model.map_estimators(lambda estimator: compile_model(estimator, max_rows))
+
+    module = type(model).__module__
+    if module.startswith("sklearn.ensemble"):
+        compiled = _compile_sklearn_forest(model)
+    elif module.startswith("xgboost"):
+        compiled = _compile_xgboost(model)
+    elif module.startswith("lightgbm"):
+        compiled = _compile_lightgbm(model)
+    else:
+        raise TypeError(f"Cannot compile {type(model).__name__} for tree inference")
+    return compiled.with_fallback(model, max_rows) if max_rows is not None else compiled
+
+def tree_backend(service: str) -> str:
+    """
+    Inference backend for tree models of `service`, e.g. 'healthcare.readmission_prediction'.
+    AGENTDS_TREE_BACKEND_<SERVICE> (dots as underscores, upper case) overrides the
+    process-wide AGENTDS_TREE_BACKEND; both default to 'sklearn'.
+    """
+    key = "AGENTDS_TREE_BACKEND_" + service.replace(".", "_").upper()
+    backend = (os.getenv(key) or os.getenv("AGENTDS_TREE_BACKEND") or "sklearn").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown tree backend '{backend}' for {service}; expected one of {BACKENDS}")
+    return backend
+
+def inference_model(model, service: str, artifact_path: Path = None):
+    """
+    `model` as it should be served by `service`: compiled when the service
+    selects the compiled backend, unchanged otherwise or if it cannot be compiled.
+    Batches above AGENTDS_TREE_COMPILED_MAX_ROWS rows (default 32; 0 for no
+    limit) still go to the original model.
+
+    With no row limit, AGENTDS_ARTIFACT_MMAP set and the `artifact_path`
+    `model` was loaded from, the compiled model is saved next to the artifact
+    and memory-mapped from there, so every worker process serving it shares
+    one copy of the node arrays.
+    """
+    if tree_backend(service) != "compiled":
+        return model
+    max_rows = int(os.getenv("AGENTDS_TREE_COMPILED_MAX_ROWS", DEFAULT_COMPILED_MAX_ROWS))
+    try:
+        if max_rows <= 0 and artifact_path is not None and artifact_mmap_mode() is not None:
+            compiled = _shared_compiled_model(model, Path(artifact_path))
+        else:
+            compiled = compile_model(model, max_rows if max_rows > 0 else None)
+    except TypeError as e:
+        logger.warning(f"{service}: serving with sklearn, compiled tree backend unavailable: {e}")
+        return model
+    logger.info(f"{service}: serving with the compiled tree backend")
+    return compiled
+
+def _shared_compiled_model(model, artifact_path: Path):
+    """Compiled `model`, memory-mapped from a copy saved next to its artifact (rebuilt when older)."""
+    compiled_path = artifact_path.with_name(f"{artifact_path.stem}.compiled{artifact_path.suffix}")
+    if not compiled_path.exists() or compiled_path.stat().st_mtime < artifact_path.stat().st_mtime:
+        # Uncompressed, so that the node arrays can be mapped
+        save_artifact(compile_model(model), compiled_path, compress=0)
+    return load_artifact(compiled_path)
+
+def _compile_sklearn_forest(model) -> CompiledTreeEnsemble:
+    from sklearn.base import is_classifier
+
+    if not hasattr(model, "estimators_") or not hasattr(model.estimators_[0], "tree_"):
+        raise TypeError(f"Cannot compile {type(model).__name__}: not a fitted forest of decision trees")
+    if model.n_outputs_ != 1:
+        raise TypeError("Multi-output forests are not supported")
+
+    classifier = is_classifier(model)
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        left, right = _self_loop_leaves(tree.children_left, tree.children_right)
+        value = tree.value[:, 0, :]
+        if classifier:
+            value = value[:, :model.n_classes_]
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        trees.append({
+            "feature": np.maximum(tree.feature, 0),
+            "threshold": tree.threshold,
+            "left": left,
+            "right": right,
+            "default_left": getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, np.uint8)),
+            "value": value if classifier else value[:, 0],
+        })
+    return CompiledTreeEnsemble(trees, kind="forest", input_dtype=np.float32, strict=False,
+                                classes=model.classes_ if classifier else None, n_features=model.n_features_in_)
+
+def _compile_xgboost(model) -> CompiledTreeEnsemble:
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    objective = learner["objective"]["name"]
+    if learner["gradient_booster"]["name"] != "gbtree":
+        raise TypeError(f"XGBoost booster {learner['gradient_booster']['name']} is not supported")
+    if objective not in ("multi:softprob", "multi:softmax", "binary:logistic"):
+        raise TypeError(f"XGBoost objective {objective} is not supported")
+
+    gbtree = learner["gradient_booster"]["model"]
+    n_trees = len(gbtree["trees"])
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is not None:
+        # Same trees the sklearn wrapper predicts with after early stopping
+        n_trees = gbtree["iteration_indptr"][int(best_iteration) + 1]
+
+    trees = []
+    for tree in gbtree["trees"][:n_trees]:
+        if any(tree["split_type"]):
+            raise TypeError("XGBoost categorical splits are not supported")
+        left, right = _self_loop_leaves(np.array(tree["left_children"]), np.array(tree["right_children"]))
+        conditions = np.array(tree["split_conditions"], dtype=np.float32)
+        trees.append({
+            "feature": np.array(tree["split_indices"]),
+            "threshold": conditions,
+            "left": left,
+            "right": right,
+            "default_left": np.array(tree["default_left"]),
+            # Leaves keep their value in split_conditions
+            "value": conditions,
+        })
+
+    base_score = np.array(json.loads(learner["learner_model_param"]["base_score"]), dtype=np.float32).ravel()
+    if objective == "binary:logistic":
+        base_margin, link = np.log(base_score / (1 - base_score)).astype(np.float32), "sigmoid"
+    else:
+        n_class = int(learner["learner_model_param"]["num_class"])
+        base_margin, link = np.broadcast_to(base_score, (n_class,)).astype(np.float32), "softmax"
+    missing = model.missing if model.missing is not None else np.nan
+
+    return CompiledTreeEnsemble(trees, kind="boosted", input_dtype=np.float32, strict=True, absent_is_missing=True,
+                                groups=np.array(gbtree["tree_info"][:n_trees]), base_margin=base_margin, link=link,
+                                classes=np.asarray(model.classes_), n_features=booster.num_features(),
+                                missing_value=float(missing))
+
+def _compile_lightgbm(model) -> CompiledTreeEnsemble:
+    if not hasattr(model, "classes_"):
+        raise TypeError("Only LightGBM classifiers are supported")
+    dump = model.booster_.dump_model()
+    objective = dump["objective"].split()
+    if objective[0] not in ("multiclass", "binary"):
+        raise TypeError(f"LightGBM objective {objective[0]} is not supported")
+    if dump.get("average_output"):
+        raise TypeError("LightGBM random forest mode is not supported")
+
+    per_iteration = dump["num_tree_per_iteration"]
+    tree_info = dump["tree_info"]
+    best_iteration = model.best_iteration_ if getattr(model, "best_iteration_", None) else None
+    if best_iteration:
+        tree_info = tree_info[:best_iteration * per_iteration]
+
+    trees = [_flatten_lightgbm_tree(info["tree_structure"]) for info in tree_info]
+    sigmoid = 1.0
+    for part in objective[1:]:
+        if part.startswith("sigmoid:"):
+            sigmoid = float(part.split(":", 1)[1])
+
+    return CompiledTreeEnsemble(trees, kind="boosted", input_dtype=np.float64, strict=False,
+                                groups=np.arange(len(trees)) % per_iteration,
+                                base_margin=np.zeros(per_iteration),
+                                link="softmax" if objective[0] == "multiclass" else "sigmoid", sigmoid=sigmoid,
+                                classes=np.asarray(model.classes_), n_features=dump["max_feature_idx"] + 1)
+
+def _flatten_lightgbm_tree(root) -> Dict[str, np.ndarray]:
+    nodes = []
+    children = []
+
+    def visit(node):
+        index = len(nodes)
+        nodes.append(node)
+        children.append([index, index])
+        if "leaf_value" not in node:
+            if node["decision_type"] != "<=":
+                raise TypeError("LightGBM categorical splits are not supported")
+            children[index][0] = visit(node["left_child"])
+            children[index][1] = visit(node["right_child"])
+        return index
+
+    visit(root)
+    children = np.array(children, dtype=np.int64)
+    split = ["leaf_value" not in node for node in nodes]
+    return {
+        "feature": np.array([node.get("split_feature", 0) for node in nodes]),
+        "threshold": np.array([node.get("threshold", 0.0) for node in nodes], dtype=np.float64),
+        "left": children[:, 0],
+        "right": children[:, 1],
+        "default_left": np.array([node.get("default_left", False) for node in nodes]),
+        "nan_as_zero": np.array([is_split and node["missing_type"] != "NaN"
+                                 for node, is_split in zip(nodes, split)]),
+        "zero_missing": np.array([is_split and node["missing_type"] == "Zero"
+                                  for node, is_split in zip(nodes, split)]),
+        "value": np.array([node.get("leaf_value", 0.0) for node in nodes], dtype=np.float64),
+    }
+
+def _self_loop_leaves(left, right):
+    """Child arrays with every leaf (child -1) pointing to itself."""
+    leaf = left < 0
+    index = np.arange(len(left))
+    return np.where(leaf, index, left), np.where(leaf, index, right)
+
+def _max_depth(left, right) -> int:
+    depth = np.zeros(len(left), dtype=np.int64)
+    deepest = 0
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        for child in (left[node], right[node]):
+            if child != node and child >= 0:
+                depth[child] = depth[node] + 1
+                deepest = max(deepest, depth[child])
+                stack.append(child)
+    return int(deepest)
@@ -1,20 +1,32 @@
 import pandas as pd
-from backend.common.utils.io import load_artifact, load_json
+from backend.common.utils.model_registry import VersionedModel
+from backend.common.utils.tree_inference import inference_model
+from backend.healthcare.shared.inference import predict_with_proba
 from backend.healthcare.discharge_readiness.model.train import MODEL_PATH, METADATA_PATH
 
-feature_metadata = None
-model_pipeline = None
+# Reloaded in the background when training writes new artifacts; the forest is
+# compiled for inference if AGENTDS_TREE_BACKEND(_<SERVICE>) selects "compiled"
+model = VersionedModel(MODEL_PATH, METADATA_PATH,
+                       prepare=lambda pipeline: inference_model(pipeline, "healthcare.discharge_readiness",
+                                                               artifact_path=MODEL_PATH))
 
 def load_resources():
-    global model_pipeline, feature_metadata
-    if model_pipeline is None:
-        model_pipeline = load_artifact(MODEL_PATH)
-    if feature_metadata is None:
-        feature_metadata = load_json(METADATA_PATH)
+    return model.get()
 
 def make_prediction(data: list):
-    load_resources()
+    current = load_resources()
     df = pd.DataFrame(data)
-    preds = model_pipeline.predict(df)
-    proba = model_pipeline.predict_proba(df)
-    return preds.tolist(), proba.tolist()
+    preds, proba = predict_with_proba(current.model, df)
+    return preds.tolist(), proba.tolist(), current.version
+
+def warmup():
+    """
+    Runs one prediction on the sample record stored at training time, so the
+    first real request does not pay for lazy initialisation.
+    Returns False if the artifacts predate sample records.
+    """
+    sample = load_resources().metadata.get("sample_record")
+    if sample is None:
+        return False
+    make_prediction([sample])
+    return True
@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from backend.healthcare.shared.dataset_loader import loader
-from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data
+from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data_with_profile
 from backend.healthcare.shared.evaluation import evaluate_classification
 from backend.common.utils.paths import get_artifacts_path
 from backend.common.utils.io import save_artifact, save_json
+from backend.common.utils.model_registry import new_version
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,12 +18,19 @@ ARTIFACTS_DIR = get_artifacts_path("healthcare", "discharge_readiness")
 MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
 PIPELINE_PATH = ARTIFACTS_DIR / "pipeline.pkl"
 METADATA_PATH = ARTIFACTS_DIR / "metadata.json"
+PROFILE_PATH = ARTIFACTS_DIR / "profile.json"
 
 TARGET_COL = "ready_for_discharge" 
 
-def train_model():
+def train_model(progress=None):
+    """
+    Trains and saves the model pipeline.
+    `progress(stage)` is called as the run enters load, clean, fit, evaluate and save.
+    """
+    report = progress or (lambda stage: None)
     logger.info("Starting training for Discharge Readiness...")
     
+    report("load")
     try:
         df = loader.get_discharge_data()
     except Exception as e:
@@ -29,7 +39,8 @@ def train_model():
     if df.empty:
          return {"success": False, "error": "No data found for Discharge Readiness."}
 
-    df = clean_data(df, target_col=TARGET_COL)
+    report("clean")
+    df, profile = clean_data_with_profile(df, target_col=TARGET_COL)
     
     if TARGET_COL not in df.columns:
         possible = [c for c in df.columns if 'ready' in c.lower() or 'status' in c.lower()]
@@ -45,6 +56,7 @@ def train_model():
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+    report("fit")
     preprocessor = create_preprocessing_pipeline(X_train)
     
     model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
@@ -54,22 +66,30 @@ def train_model():
 
     pipeline.fit(X_train, y_train)
 
+    report("evaluate")
     y_pred = pipeline.predict(X_test)
     metrics = evaluate_classification(y_test, y_pred)
     logger.info(f"Training metrics: {metrics}")
 
+    report("save")
     save_artifact(pipeline, MODEL_PATH)
     
+    version = new_version()
     metadata = {
+        "version": version,
         "features": list(X.columns),
         "target": target,
-        "metrics": metrics
+        "metrics": metrics,
+        # One raw input row, used for the warm-up prediction at startup
+        "sample_record": json.loads(X_train.head(1).to_json(orient="records"))[0]
     }
+    save_json(profile, PROFILE_PATH)
     save_json(metadata, METADATA_PATH)
 
     return {
         "success": True, 
         "metrics": metrics, 
         "input_shape": X.shape, 
-        "artifact_path": str(MODEL_PATH)
+        "artifact_path": str(MODEL_PATH),
+        "model_version": version
     }
@@ -1,7 +1,15 @@
+from backend.common.utils.batching import MicroBatcher
+from backend.common.utils.jobs import training_jobs
+from backend.common.utils.lifecycle import service_registry
 from backend.healthcare.discharge_readiness.model.train import train_model
-from backend.healthcare.discharge_readiness.model.predict import make_prediction
+from backend.healthcare.discharge_readiness.model.predict import make_prediction, load_resources, warmup, model
+
+SERVICE_NAME = "healthcare.discharge_readiness"
 
 class DischargeReadinessService:
+    def __init__(self, max_wait_ms: float = 5.0, max_batch_rows: int = 256):
+        self.batcher = MicroBatcher(make_prediction, max_wait_ms=max_wait_ms, max_batch_rows=max_batch_rows)
+
     @staticmethod
     def train():
         return train_model()
@@ -10,4 +18,35 @@ class DischargeReadinessService:
     def predict(data: list):
         return make_prediction(data)
 
-service = DischargeReadinessService()
+    @staticmethod
+    def load_resources():
+        load_resources()
+
+    @staticmethod
+    def model_version():
+        return model.version
+
+    @property
+    def is_loaded(self):
+        return model.version is not None
+
+    @staticmethod
+    def warmup():
+        return warmup()
+
+    @staticmethod
+    def start_training():
+        # Runs train_model in a separate process; returns (job, created)
+        # The new model is swapped in as soon as the job succeeds
+        return training_jobs.submit(SERVICE_NAME, train_model, on_success=lambda job: model.refresh())
+
+    @staticmethod
+    def get_training_job(job_id: str):
+        job = training_jobs.get(job_id)
+        return job if job is not None and job.service == SERVICE_NAME else None
+
+    async def predict_batched(self, data: list):
+        return await self.batcher.submit(data)
+
+service = DischargeReadinessService(max_wait_ms=10.0, max_batch_rows=256)
+service_registry.register(SERVICE_NAME, service)
@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestRegressor
 from backend.healthcare.shared.dataset_loader import loader
-from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data
+from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data_with_profile
 from backend.healthcare.shared.evaluation import evaluate_regression
 from backend.common.utils.paths import get_artifacts_path
 from backend.common.utils.io import save_artifact, save_json
+from backend.common.utils.model_registry import new_version
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,12 +18,19 @@ ARTIFACTS_DIR = get_artifacts_path("healthcare", "ed_cost_forecasting")
 MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
 PIPELINE_PATH = ARTIFACTS_DIR / "pipeline.pkl"
 METADATA_PATH = ARTIFACTS_DIR / "metadata.json"
+PROFILE_PATH = ARTIFACTS_DIR / "profile.json"
 
 TARGET_COL = "ed_cost"
 
-def train_model():
+def train_model(progress=None):
+    """
+    Trains and saves the model pipeline.
+    `progress(stage)` is called as the run enters load, clean, fit, evaluate and save.
+    """
+    report = progress or (lambda stage: None)
     logger.info("Starting training for ED Cost Forecasting...")
     
+    report("load")
     try:
         df = loader.get_ed_cost_data()
     except Exception as e:
@@ -30,7 +40,8 @@ def train_model():
     if df.empty:
          return {"success": False, "error": "No data found for ED Cost."}
 
-    df = clean_data(df, target_col=TARGET_COL)
+    report("clean")
+    df, profile = clean_data_with_profile(df, target_col=TARGET_COL)
     
     # Infer target if explicit name missing
     if TARGET_COL not in df.columns:
@@ -47,6 +58,7 @@ def train_model():
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+    report("fit")
     preprocessor = create_preprocessing_pipeline(X_train)
     
     model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
@@ -56,22 +68,30 @@ def train_model():
 
     pipeline.fit(X_train, y_train)
 
+    report("evaluate")
     y_pred = pipeline.predict(X_test)
     metrics = evaluate_regression(y_test, y_pred)
     logger.info(f"Training metrics: {metrics}")
 
+    report("save")
     save_artifact(pipeline, MODEL_PATH)
     
+    version = new_version()
     metadata = {
+        "version": version,
         "features": list(X.columns),
         "target": target,
-        "metrics": metrics
+        "metrics": metrics,
+        # One raw input row, used for the warm-up prediction at startup
+        "sample_record": json.loads(X_train.head(1).to_json(orient="records"))[0]
     }
+    save_json(profile, PROFILE_PATH)
     save_json(metadata, METADATA_PATH)
 
     return {
         "success": True, 
         "metrics": metrics, 
         "input_shape": X.shape, 
-        "artifact_path": str(MODEL_PATH)
+        "artifact_path": str(MODEL_PATH),
+        "model_version": version
     }
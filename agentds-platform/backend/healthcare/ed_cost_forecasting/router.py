@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from backend.common.schemas.base import BaseResponse
+from backend.common.utils.executor import PoolSaturatedError
 from backend.healthcare.ed_cost_forecasting.schemas import BatchRecords, PredictionOutput
 from backend.healthcare.ed_cost_forecasting.service import service
 import logging
@@ -17,36 +18,53 @@ async def health_check():
     return BaseResponse(
         success=True, 
         message="ED Cost Forecasting service is healthy",
-        metadata={"domain": "healthcare", "service": "ed_cost_forecasting"}
+        metadata={"domain": "healthcare", "service": "ed_cost_forecasting", "model_version": service.model_version()}
     )
 
-@router.post("/train", response_model=BaseResponse)
+@router.post("/train", response_model=BaseResponse, status_code=202)
 async def train():
+    """
+    Starts a background training job and returns its ID immediately.
+    Poll GET /train/{job_id} for stage, elapsed time and final metrics.
+    """
     try:
-        result = service.train()
-        if not result["success"]:
-             raise HTTPException(status_code=500, detail=result.get("error"))
-        return BaseResponse(
-            success=True,
-            message="Training completed successfully",
-            data=result,
-            metadata={"metrics": result.get("metrics")}
-        )
+        job, created = service.start_training()
     except Exception as e:
-        logger.error(f"Training failed: {e}")
+        logger.error(f"Could not start training: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    return BaseResponse(
+        success=True,
+        message="Training started" if created else "Training already in progress",
+        data=job.to_dict(),
+        metadata={"job_id": job.job_id}
+    )
+
+@router.get("/train/{job_id}", response_model=BaseResponse)
+async def train_status(job_id: str):
+    job = service.get_training_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Training job {job_id} not found")
+    status = job.to_dict()
+    return BaseResponse(
+        success=job.status != "failed",
+        message=f"Training job {job.status}",
+        data=status,
+        metadata={"metrics": status["metrics"]}
+    )
 
 @router.post("/predict", response_model=BaseResponse)
 async def predict(payload: BatchRecords):
     try:
-        preds = service.predict(payload.records)
+        preds, version = await service.predict_batched(payload.records)
         return BaseResponse(
             success=True,
             message="Prediction successful",
-            data=PredictionOutput(predictions=preds)
+            data=PredictionOutput(predictions=preds, model_version=version)
         )
     except FileNotFoundError:
         raise HTTPException(status_code=400, detail="Model not trained. Please call /train first.")
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
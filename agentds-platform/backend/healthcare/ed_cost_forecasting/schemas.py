@@ -6,7 +6,7 @@ class BatchRecords(BaseModel):
 
 class PredictionOutput(BaseModel):
     predictions: List[float]
-    model_version: str = "v1"
+    model_version: Optional[str] = None
 
 class TrainOutput(BaseModel):
     success: bool
@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from backend.healthcare.shared.dataset_loader import loader
-from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data
+from backend.healthcare.shared.preprocessing import create_preprocessing_pipeline, clean_data_with_profile
 from backend.healthcare.shared.evaluation import evaluate_classification
 from backend.common.utils.paths import get_artifacts_path
 from backend.common.utils.io import save_artifact, save_json
+from backend.common.utils.model_registry import new_version
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,13 +18,20 @@ ARTIFACTS_DIR = get_artifacts_path("healthcare", "readmission_prediction")
 MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
 PIPELINE_PATH = ARTIFACTS_DIR / "pipeline.pkl"
 METADATA_PATH = ARTIFACTS_DIR / "metadata.json"
+PROFILE_PATH = ARTIFACTS_DIR / "profile.json"
 
 TARGET_COL = "readmitted" # Validated from similar datasets, might need adjustment if actual column differs.
 
-def train_model():
+def train_model(progress=None):
+    """
+    Trains and saves the model pipeline.
+    `progress(stage)` is called as the run enters load, clean, fit, evaluate and save.
+    """
+    report = progress or (lambda stage: None)
     logger.info("Starting training for Readmission Prediction...")
     
     # 1. Load Data
+    report("load")
     try:
         df = loader.get_readmission_data()
     except Exception as e:
@@ -29,7 +39,8 @@ def train_model():
         return {"success": False, "error": str(e)}
 
     # 2. Cleanup & Split
-    df = clean_data(df, target_col=TARGET_COL)
+    report("clean")
+    df, profile = clean_data_with_profile(df, target_col=TARGET_COL)
     
     if TARGET_COL not in df.columns:
         # Attempt minimal inferrence if standard name fails
@@ -50,6 +61,7 @@ def train_model():
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
     # 3. Preprocessing
+    report("fit")
     preprocessor = create_preprocessing_pipeline(X_train)
     
     # 4. Model
@@ -62,23 +74,31 @@ def train_model():
     clf.fit(X_train, y_train)
 
     # 6. Evaluate
+    report("evaluate")
     y_pred = clf.predict(X_test)
     metrics = evaluate_classification(y_test, y_pred)
     logger.info(f"Training metrics: {metrics}")
 
     # 7. Save
+    report("save")
     save_artifact(clf, MODEL_PATH)
     
+    version = new_version()
     metadata = {
+        "version": version,
         "features": list(X.columns),
         "target": target,
-        "metrics": metrics
+        "metrics": metrics,
+        # One raw input row, used for the warm-up prediction at startup
+        "sample_record": json.loads(X_train.head(1).to_json(orient="records"))[0]
     }
+    save_json(profile, PROFILE_PATH)
     save_json(metadata, METADATA_PATH)
 
     return {
         "success": True, 
         "metrics": metrics, 
         "input_shape": X.shape, 
-        "artifact_path": str(MODEL_PATH)
+        "artifact_path": str(MODEL_PATH),
+        "model_version": version
     }
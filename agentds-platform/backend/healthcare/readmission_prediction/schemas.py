@@ -18,7 +18,7 @@ class BatchRecords(BaseModel):
 class PredictionOutput(BaseModel):
     predictions: List[Union[float, int, str]]
     probabilities: Optional[List[List[float]]] = None
-    model_version: str = "v1"
+    model_version: Optional[str] = None
 
 class TrainOutput(BaseModel):
     success: bool
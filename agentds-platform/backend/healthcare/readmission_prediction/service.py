@@ -1,7 +1,16 @@
+from backend.common.utils.batching import MicroBatcher
+from backend.common.utils.jobs import training_jobs
+from backend.common.utils.lifecycle import service_registry
 from backend.healthcare.readmission_prediction.model.train import train_model
-from backend.healthcare.readmission_prediction.model.predict import make_prediction
+from backend.healthcare.readmission_prediction.model.predict import make_prediction, load_resources, warmup, model
+
+SERVICE_NAME = "healthcare.readmission_prediction"
 
 class ReadmissionService:
+    def __init__(self, max_wait_ms: float = 5.0, max_batch_rows: int = 256):
+        # Concurrent /predict calls are coalesced into one pipeline call
+        self.batcher = MicroBatcher(make_prediction, max_wait_ms=max_wait_ms, max_batch_rows=max_batch_rows)
+
     @staticmethod
     def train():
         # Wrapper for training logic
@@ -14,4 +23,35 @@ class ReadmissionService:
         # allows adding monitoring, caching, etc.
         return make_prediction(data)
 
-service = ReadmissionService()
+    @staticmethod
+    def load_resources():
+        load_resources()
+
+    @staticmethod
+    def model_version():
+        return model.version
+
+    @property
+    def is_loaded(self):
+        return model.version is not None
+
+    @staticmethod
+    def warmup():
+        return warmup()
+
+    @staticmethod
+    def start_training():
+        # Runs train_model in a separate process; returns (job, created)
+        # The new model is swapped in as soon as the job succeeds
+        return training_jobs.submit(SERVICE_NAME, train_model, on_success=lambda job: model.refresh())
+
+    @staticmethod
+    def get_training_job(job_id: str):
+        job = training_jobs.get(job_id)
+        return job if job is not None and job.service == SERVICE_NAME else None
+
+    async def predict_batched(self, data: list):
+        return await self.batcher.submit(data)
+
+service = ReadmissionService(max_wait_ms=5.0, max_batch_rows=256)
+service_registry.register(SERVICE_NAME, service)
@@ -1,15 +1,53 @@
 from datasets import load_dataset
+from pathlib import Path
 import pandas as pd
+import pyarrow.feather as feather
+import hashlib
+import json
 import logging
+import os
+import time
+from backend.common.utils.paths import get_data_cache_path
 
 logger = logging.getLogger(__name__)
 
 DATASET_NAME = "lainmn/AgentDS-Healthcare"
+MANIFEST_NAME = "manifest.json"
+CACHE_FORMAT = 1
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 class DatasetLoader:
-    def __init__(self):
+    """
+    Loads the AgentDS healthcare dataset through a local columnar cache.
+
+    Each split is written once as an uncompressed Arrow IPC (Feather v2) file.
+    Later loads memory-map that file and convert only the requested columns
+    to pandas. manifest.json records, per split, the Hub fingerprint it was
+    built from and the sha256 of the file; a file that no longer matches its
+    hash is rebuilt. Once the cache is valid the Hub is not contacted again
+    unless AGENTDS_DATASET_REFRESH=1, which re-checks the fingerprints.
+
+    With AGENTDS_DATASET_OFFLINE=1 (or HF_DATASETS_OFFLINE=1) the loader only
+    reads the cache, which can be pre-seeded by copying a directory built
+    with `python -m backend.healthcare.shared.dataset_loader`.
+    """
+    def __init__(self, cache_dir: Path = None, offline: bool = None):
         self.dataset_name = DATASET_NAME
+        self.cache_dir = Path(cache_dir) if cache_dir else get_data_cache_path("healthcare") / DATASET_NAME.replace("/", "__")
+        self.offline = offline if offline is not None else (
+            _env_flag("AGENTDS_DATASET_OFFLINE") or _env_flag("HF_DATASETS_OFFLINE"))
+        self.refresh = _env_flag("AGENTDS_DATASET_REFRESH")
         self.ds = None
+        self._manifest = None
 
     def load_full_dataset(self):
         """Loads the huggingface dataset."""
@@ -23,12 +61,138 @@ class DatasetLoader:
                 raise e
         return self.ds
 
-    def get_challenge_data(self, keyword: str):
+    def materialize(self, force: bool = False) -> dict:
+        """
+        Writes every split of the Hub dataset to the cache, skipping splits
+        whose fingerprint and file are unchanged. Returns the manifest.
+        """
+        if self.offline:
+            raise RuntimeError("Cannot materialize the dataset cache in offline mode.")
+        ds = self.load_full_dataset()
+        previous = (self._read_manifest() or {}).get("splits", {})
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        splits = {}
+        for name in ds.keys():
+            fingerprint = getattr(ds[name], "_fingerprint", None)
+            entry = previous.get(name)
+            if (not force and fingerprint is not None and entry is not None
+                    and entry.get("fingerprint") == fingerprint and self._verify(entry)):
+                splits[name] = entry
+                continue
+            splits[name] = self._write_split(name, ds[name].with_format("arrow")[:], fingerprint)
+
+        manifest = {"dataset": self.dataset_name, "format": CACHE_FORMAT, "created_at": time.time(), "splits": splits}
+        self._write_manifest(manifest)
+        self._manifest = manifest
+        return manifest
+
+    def split_names(self) -> list:
+        return list(self._ensure_cache()["splits"])
+
+    def load_split(self, name: str, columns: list = None) -> pd.DataFrame:
+        """
+        Reads one cached split, memory-mapped; only `columns` (all if None)
+        are materialized as a DataFrame.
+        """
+        splits = self._ensure_cache()["splits"]
+        if name not in splits:
+            raise ValueError(f"Split '{name}' not in dataset cache. Available: {list(splits)}")
+        start = time.perf_counter()
+        table = feather.read_table(self.cache_dir / splits[name]["file"], columns=columns, memory_map=True)
+        df = table.to_pandas()
+        logger.info(f"Loaded {name} from cache: {df.shape[0]} rows x {df.shape[1]} cols in {time.perf_counter() - start:.2f}s")
+        return df
+
+    def _ensure_cache(self) -> dict:
+        if self._manifest is not None:
+            return self._manifest
+        if self.refresh and not self.offline:
+            return self.materialize()
+
+        manifest = self._read_manifest()
+        if manifest is not None:
+            mtimes = [entry.get("mtime_ns") for entry in manifest["splits"].values()]
+            if all(self._verify(entry) for entry in manifest["splits"].values()):
+                # Persist the mtimes of files revalidated by hash, so they are not hashed again
+                if [entry.get("mtime_ns") for entry in manifest["splits"].values()] != mtimes:
+                    try:
+                        self._write_manifest(manifest)
+                    except OSError as e:
+                        logger.warning(f"Could not update dataset manifest in {self.cache_dir}: {e}")
+                self._manifest = manifest
+                return manifest
+        if self.offline:
+            raise FileNotFoundError(
+                f"No valid dataset cache at {self.cache_dir} and offline mode is on. "
+                "Build it on a host with network access and copy the directory, "
+                "or point AGENTDS_DATA_CACHE_DIR at a pre-seeded copy."
+            )
+        logger.info(f"Building dataset cache in {self.cache_dir}...")
+        return self.materialize()
+
+    def _read_manifest(self):
+        path = self.cache_dir / MANIFEST_NAME
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable dataset manifest {path}: {e}")
+            return None
+        if manifest.get("dataset") != self.dataset_name or manifest.get("format") != CACHE_FORMAT:
+            return None
+        return manifest
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = self.cache_dir / (MANIFEST_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, self.cache_dir / MANIFEST_NAME)
+
+    def _write_split(self, name: str, table, fingerprint) -> dict:
+        file_name = f"{name}.arrow"
+        path = self.cache_dir / file_name
+        tmp_path = self.cache_dir / (file_name + ".tmp")
+        # Uncompressed so that reads can memory-map the file
+        feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        stat = path.stat()
+        logger.info(f"Cached split {name}: {table.num_rows} rows, {stat.st_size / 1e6:.1f} MB")
+        return {
+            "file": file_name,
+            "fingerprint": fingerprint,
+            "sha256": _sha256(path),
+            "num_rows": table.num_rows,
+            "columns": table.column_names,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+
+    def _verify(self, entry: dict) -> bool:
+        path = self.cache_dir / entry["file"]
+        if not path.exists():
+            return False
+        stat = path.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        # Unchanged since it was hashed: skip re-hashing (copied seeds get a new mtime and are hashed once)
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+        if _sha256(path) != entry["sha256"]:
+            logger.warning(f"Dataset cache file {path} does not match its manifest hash")
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def get_challenge_data(self, keyword: str, columns: list = None):
         """
         Heuristic to find the right subset/file for a challenge.
         Looks for keys in the dataset that match the keyword.
+        `columns` restricts the load to those columns.
         """
-        ds = self.load_full_dataset()
+        keys = self.split_names()
         
         # Heuristic: inspect available keys
         # The dataset might be a DatasetDict with keys like 'train', 'test' 
@@ -40,7 +204,7 @@ class DatasetLoader:
         # or we filter a main table. 
         # Given "lainmn/AgentDS-Healthcare", let's assume likely keys.
         
-        relevant_keys = [k for k in ds.keys() if keyword in k.lower()]
+        relevant_keys = [k for k in keys if keyword in k.lower()]
         
         if not relevant_keys:
             # Fallback for when data might be packed in a way that requires manual mapping
@@ -50,19 +214,19 @@ class DatasetLoader:
             
             # Additional Heuristic: Check for 'train' and assume it's a monolithic dataset
             # if specific keys aren't found, OR try to map known file names.
-            logger.warning(f"No specific key found for {keyword}. Available keys: {list(ds.keys())}")
+            logger.warning(f"No specific key found for {keyword}. Available keys: {keys}")
             
             # Mock return for development if real data missing (remove in prod)
             # return pd.DataFrame() 
-            raise ValueError(f"Could not find data for keyword '{keyword}' in {list(ds.keys())}")
+            raise ValueError(f"Could not find data for keyword '{keyword}' in {keys}")
 
         # Combine splits if multiple relevant ones found, or return the most likely 'train'
         # Ideally we want train and test.
         
         train_key = next((k for k in relevant_keys if 'train' in k), relevant_keys[0])
-        return ds[train_key].to_pandas()
+        return self.load_split(train_key, columns=columns)
 
-    def get_readmission_data(self):
+    def get_readmission_data(self, columns: list = None):
         """
         PS1: 30-day readmission prediction.
         Expected files/keys might involve 'readmission' or 'hospital'.
@@ -71,27 +235,34 @@ class DatasetLoader:
          # In a real scenario, we'd check `description.md` or dataset keys.
          # Hypothesizing keys based on typical structure.
         try:
-             return self.get_challenge_data("readmission")
+             return self.get_challenge_data("readmission", columns)
         except ValueError:
             # Fallback if specific naming differs
-            return self.get_challenge_data("train") # Dangerous fallback, but placeholder
+            return self.get_challenge_data("train", columns) # Dangerous fallback, but placeholder
 
-    def get_ed_cost_data(self):
+    def get_ed_cost_data(self, columns: list = None):
         """
         PS2: ED cost forecasting.
         """
         try:
-            return self.get_challenge_data("cost")
+            return self.get_challenge_data("cost", columns)
         except ValueError:
              return pd.DataFrame() # fail gracefully
 
-    def get_discharge_data(self):
+    def get_discharge_data(self, columns: list = None):
         """
         PS3: Discharge readiness.
         """
         try:
-            return self.get_challenge_data("discharge")
+            return self.get_challenge_data("discharge", columns)
         except ValueError:
              return pd.DataFrame()
 
 loader = DatasetLoader()
+
+if __name__ == "__main__":
+    # Build or refresh the cache, e.g. before copying it to an offline host
+    logging.basicConfig(level=logging.INFO)
+    manifest = loader.materialize(force=_env_flag("AGENTDS_DATASET_FORCE"))
+    for name, entry in manifest["splits"].items():
+        print(f"{name}: {entry['num_rows']} rows -> {loader.cache_dir / entry['file']}")
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+def predict_with_proba(model_pipeline, df: pd.DataFrame):
+    """
+    Classification inference in a single pass.
+
+    Calling pipeline.predict() and then pipeline.predict_proba() runs the
+    preprocessing and every tree twice. Here the preprocessed matrix is built
+    once, predict_proba runs once, and labels are taken from the argmax of the
+    probabilities (which is what forest classifiers' predict() does).
+    
+    Returns (labels, probabilities) as numpy arrays.
+    """
+    if isinstance(model_pipeline, Pipeline):
+        X = model_pipeline[:-1].transform(df)
+        classifier = model_pipeline[-1]
+    else:
+        X, classifier = df, model_pipeline
+
+    proba = classifier.predict_proba(X)
+    labels = classifier.classes_.take(np.argmax(proba, axis=1))
+    return labels, proba
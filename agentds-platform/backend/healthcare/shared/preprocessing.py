@@ -4,6 +4,10 @@ from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 import pandas as pd
 import numpy as np
+import logging
+from backend.healthcare.shared.profiling import hash_columns, row_hashes, profile_columns
+
+logger = logging.getLogger(__name__)
 
 def create_preprocessing_pipeline(X: pd.DataFrame):
     """
@@ -39,19 +43,37 @@ def clean_data(df: pd.DataFrame, target_col: str = None):
     1. Drop duplicates.
     2. Drop IDs if looks like an ID (high cardinality categorical matching row count - strict heuristic).
     """
-    df = df.drop_duplicates()
-    
-    # Heuristic: Drop columns that are obviously IDs (all unique, object/int type)
+    df, _ = clean_data_with_profile(df, target_col=target_col)
+    return df
+
+def clean_data_with_profile(df: pd.DataFrame, target_col: str = None):
+    """
+    clean_data() plus the column profile it was based on.
+
+    Every column is hashed once; the same hashes give the row hashes used to
+    drop duplicate rows and the distinct counts used to find ID columns
+    (see profiling.profile_columns), replacing drop_duplicates() and a
+    nunique() per column. Returns (df, profile).
+    """
+    n_input = len(df)
+    # Distinct counts from factorizing survive deduplication: every value keeps at least one row
+    column_hashes, exact_distinct = hash_columns(df)
+
+    # 64-bit row hashes: a false duplicate needs a hash collision (~1e-6 at 10M rows)
+    duplicated = pd.Series(row_hashes(column_hashes, n_input)).duplicated().to_numpy()
+    if duplicated.any():
+        keep = ~duplicated
+        df = df[keep]
+        column_hashes = {col: hashes[keep] for col, hashes in column_hashes.items()}
+
+    profile = profile_columns(df, column_hashes, exact_distinct)
+    profile["duplicates_dropped"] = int(duplicated.sum())
+
     # Be careful not to drop the target.
-    drop_cols = []
-    for col in df.columns:
-        if col == target_col:
-            continue
-        if df[col].nunique() == len(df):
-            # Likely an ID
-            drop_cols.append(col)
-            
+    drop_cols = [col for col, stats in profile["columns"].items() if stats["is_id"] and col != target_col]
+    profile["dropped_id_columns"] = drop_cols
     if drop_cols:
         df = df.drop(columns=drop_cols)
-        
-    return df
+
+    logger.info(f"Cleaned {n_input} rows: dropped {profile['duplicates_dropped']} duplicates and ID columns {drop_cols}")
+    return df, profile
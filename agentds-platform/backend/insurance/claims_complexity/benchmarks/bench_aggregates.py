@@ -0,0 +1,63 @@
+"""
+Point-in-time policy aggregates: correctness against per-row filtering and scaling in the number of claims.
+
+Checks PointInTimeAggregates on a small sample against a brute-force
+per-claim filter of the history, then times building the history and
+computing every claim's aggregates for growing claim counts. Time per
+claim should stay flat.
+
+Usage (from the claims_complexity directory):
+    python -m benchmarks.bench_aggregates --rows 100000 200000 400000 800000
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+def brute_force(claims, windows):
+    dates = pd.to_datetime(claims['ClaimDate'])
+    rows = []
+    for policy, date in zip(claims['PolicyID'], dates):
+        history = claims[(claims['PolicyID'] == policy) & (dates < date)]
+        history_dates = dates[history.index]
+        row = {'Policy_ClaimCount': len(history)}
+        for window in windows:
+            row[f'Policy_ClaimCount_{window}d'] = int((history_dates >= date - pd.Timedelta(days=window)).sum())
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 200000, 400000, 800000])
+    parser.add_argument('--claims-per-policy', type=float, default=4.0)
+    parser.add_argument('--windows', type=int, nargs='+', default=[30, 90, 365])
+    parser.add_argument('--check-rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    from benchmarks.synthetic import make_claims
+    from src.features.aggregation import PointInTimeAggregates
+
+    logging.disable(logging.INFO)
+    sample = make_claims(args.check_rows, n_policies=max(int(args.check_rows / args.claims_per_policy), 1),
+                         words_per_claim=(1, 2))
+    expected = brute_force(sample, args.windows)
+    actual = PointInTimeAggregates(['count'], windows=args.windows, window_stats=['count']).update(sample).transform(sample)
+    print(f"check on {args.check_rows} claims: counts equal to per-row filtering = "
+          f"{np.array_equal(actual[expected.columns].to_numpy(), expected.to_numpy())}")
+
+    print(f"\n{'claims':>10}{'update (s)':>12}{'transform (s)':>15}{'us / claim':>12}")
+    for n_rows in args.rows:
+        claims = make_claims(n_rows, n_policies=max(int(n_rows / args.claims_per_policy), 1), words_per_claim=(1, 2))
+        start = time.perf_counter()
+        store = PointInTimeAggregates(['count', 'mean', 'max', 'std', 'recency'], windows=args.windows).update(claims)
+        update_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store.transform(claims)
+        transform_s = time.perf_counter() - start
+        print(f"{n_rows:>10}{update_s:>12.2f}{transform_s:>15.2f}{(update_s + transform_s) / n_rows * 1e6:>12.2f}")
+    logging.disable(logging.NOTSET)
+
+if __name__ == '__main__':
+    main()
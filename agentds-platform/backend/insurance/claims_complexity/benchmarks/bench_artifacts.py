@@ -0,0 +1,109 @@
+"""
+Model artifact formats: file size, load time and per-worker memory.
+
+Fits the RF baseline on synthetic claims features and saves it with
+backend.common.utils.io.save_artifact uncompressed, compressed, and as a
+compiled tree ensemble (backend.common.utils.tree_inference). Each format
+is then loaded by `--workers` fresh processes at once, with and without
+mmap_mode='r', like uvicorn workers loading the same model. Every worker
+scores a few rows and reports its RSS and PSS after all of them have
+loaded; PSS splits shared pages between the workers, so it shows what
+memory-mapping saves.
+
+Usage (from the claims_complexity directory, with the platform root on PYTHONPATH):
+    python -m benchmarks.bench_artifacts --train-rows 20000 --workers 4
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+def load_worker(path, mmap_mode, X, barrier):
+    from backend.common.utils.io import load_artifact, process_memory
+    # Import what unpickling needs first, so load time is the artifact's alone
+    import sklearn.ensemble  # noqa: F401
+    import backend.common.utils.tree_inference  # noqa: F401
+
+    start = time.perf_counter()
+    model = load_artifact(Path(path), mmap_mode=mmap_mode)
+    load_s = time.perf_counter() - start
+    model.predict_proba(X)
+    # Measure while every worker holds the model, so shared pages are split between them
+    barrier.wait()
+    memory = process_memory()
+    barrier.wait()
+    return {'load_s': load_s, **memory}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=20000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=None, help='Override the baseline max_depth (deeper = larger artifact)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--compress', nargs='+', default=['3', 'lz4:3'],
+                        help='AGENTDS_ARTIFACT_COMPRESS values to compare; lz4 needs the lz4 package')
+    args = parser.parse_args()
+
+    from src.utils.config import load_config
+    from src.features.pipeline import ClaimsFeaturePipeline
+    from src.models.baseline import BaselineModel
+    from benchmarks.synthetic import make_claims, make_policies
+    from backend.common.utils.io import parse_compression, save_artifact
+    from backend.common.utils.tree_inference import compile_model
+
+    config = load_config()
+    config['model']['baseline']['n_estimators'] = args.n_estimators
+    if args.max_depth is not None:
+        config['model']['baseline']['max_depth'] = args.max_depth
+    n_policies = max(args.train_rows // 2, 1)
+    claims = make_claims(args.train_rows, n_policies=n_policies)
+    policies = make_policies(n_policies)
+
+    pipeline = ClaimsFeaturePipeline(config)
+    X = pipeline.fit_transform(claims, policies)
+    y = pipeline.encode_target(claims[config['data']['target_col']])
+    logging.disable(logging.INFO)
+    model = BaselineModel(config)
+    model.train(X, y)
+    X_score = X[:10]
+
+    ctx = mp.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir, ctx.Manager() as manager:
+        formats = [('sklearn', model.model, 0), ('compiled', compile_model(model.model), 0)]
+        formats += [(f'sklearn {compress}', model.model, parse_compression(compress)) for compress in args.compress]
+
+        for label, obj, compress in formats:
+            path = Path(out_dir) / f"{label.replace(' ', '_').replace(':', '-')}.joblib"
+            try:
+                size = save_artifact(obj, path, compress=compress)
+            except ValueError as e:
+                print(f"Skipping {label}: {e}")
+                continue
+            mmap_modes = [None, 'r'] if compress == 0 else [None]
+            for mmap_mode in mmap_modes:
+                barrier = manager.Barrier(args.workers)
+                with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx) as pool:
+                    futures = [pool.submit(load_worker, str(path), mmap_mode, X_score, barrier)
+                               for _ in range(args.workers)]
+                    runs = [future.result() for future in futures]
+                results.append((label, mmap_mode, size, runs))
+
+    print(f"\ntrees={args.n_estimators} features={X.shape[1]} workers={args.workers} "
+          f"(load time and memory are per worker, median over workers)")
+    print(f"{'format':<16}{'mmap':>6}{'size (MB)':>11}{'load (s)':>10}{'RSS (MB)':>10}"
+          f"{'private (MB)':>14}{'file (MB)':>11}{'PSS (MB)':>10}")
+    for label, mmap_mode, size, runs in results:
+        median = {key: np.median([run.get(key, np.nan) for run in runs])
+                  for key in ('load_s', 'rss', 'anon', 'file', 'pss')}
+        print(f"{label:<16}{mmap_mode or '-':>6}{size / 1024**2:>11.1f}{median['load_s']:>10.2f}"
+              f"{median['rss']:>10.0f}{median['anon']:>14.0f}{median['file']:>11.0f}{median['pss']:>10.0f}")
+    logging.disable(logging.NOTSET)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency and throughput of the claims complexity inference service per batch size.
+
+Fits the feature pipeline and a model on synthetic claims, saves them the way
+main.py does, loads them through ClaimsComplexityService and times predict().
+
+Usage (from the claims_complexity directory):
+    python -m benchmarks.bench_inference --train-rows 20000 --model baseline
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=20000)
+    parser.add_argument('--model', choices=['baseline', 'xgboost', 'lightgbm', 'ensemble'], default='baseline')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 5000])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    from src.utils.config import load_config
+    from src.features.pipeline import ClaimsFeaturePipeline
+    from benchmarks.synthetic import make_claims, make_policies
+    from service import ClaimsComplexityService
+
+    config = load_config()
+    config['model']['baseline']['n_estimators'] = args.n_estimators
+    for params in config['model']['advanced'].values():
+        params['n_estimators'] = args.n_estimators
+
+    n_policies = max(args.train_rows // 2, 1)
+    claims = make_claims(args.train_rows, n_policies=n_policies)
+    policies = make_policies(n_policies)
+    score_claims = make_claims(max(args.batch_sizes), n_policies=n_policies, seed=7).drop(columns=['ClaimComplexityLabel'])
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        config['paths']['models'] = models_dir
+        pipeline = ClaimsFeaturePipeline(config)
+        X = pipeline.fit_transform(claims, policies)
+        y = pipeline.encode_target(claims[config['data']['target_col']])
+
+        if args.model == 'baseline':
+            from src.models.baseline import BaselineModel
+            model = BaselineModel(config)
+        elif args.model == 'ensemble':
+            from src.models.ensemble import EnsembleModel
+            model = EnsembleModel(config)
+        else:
+            from src.models.advanced import AdvancedModel
+            model = AdvancedModel(config, model_type=args.model)
+        model.train(X, y)
+        model.save(f"{args.model}_model.joblib")
+        pipeline.save(f"{args.model}_feature_pipeline.joblib")
+
+        service = ClaimsComplexityService(model_type=args.model, models_dir=models_dir)
+        start = time.perf_counter()
+        service.load()
+        load_s = time.perf_counter() - start
+
+        # Per-request stage logging would dominate the timings
+        logging.disable(logging.INFO)
+        policy_records = policies.to_dict(orient='records')
+
+        print(f"\nmodel={args.model} n_estimators={args.n_estimators} features={len(pipeline.feature_names_)} load={load_s:.2f}s")
+        print(f"{'batch':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}{'claims/s':>12}")
+        for batch_size in args.batch_sizes:
+            batch = score_claims.head(batch_size)
+            records = batch.to_dict(orient='records')
+            used = set(batch['PolicyID'])
+            batch_policies = [p for p in policy_records if p['PolicyID'] in used]
+
+            service.predict(records, batch_policies)  # warm-up
+            timings = []
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                service.predict(records, batch_policies)
+                timings.append(time.perf_counter() - start)
+
+            timings = np.array(timings) * 1000
+            p50 = np.percentile(timings, 50)
+            print(f"{batch_size:>8}{p50:>12.2f}{np.percentile(timings, 95):>12.2f}{batch_size / (p50 / 1000):>12.0f}")
+        logging.disable(logging.NOTSET)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Default vs typed CSV loading of claims and policies: wall time, in-memory size and peak RSS.
+
+Each mode runs in a fresh process so ru_maxrss reflects only that mode.
+
+Usage (from the claims_complexity directory):
+    python -m benchmarks.bench_loading --rows 500000
+    python -m benchmarks.bench_loading --rows 500000 --chunksize 100000
+"""
+import argparse
+import copy
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def write_files(n_rows, out_dir):
+    from benchmarks.synthetic import make_claims, make_policies
+    claims = make_claims(n_rows)
+    claims.to_csv(os.path.join(out_dir, 'claims.csv'), index=False)
+    make_policies(max(n_rows // 2, 1)).to_csv(os.path.join(out_dir, 'policies.csv'), index=False)
+
+def run_mode(mode, data_dir, chunksize):
+    from src.utils.config import load_config
+    from src.data.loader import DataLoader
+
+    config = load_config()
+    config['paths']['raw_data'] = data_dir
+    if mode == 'default':
+        config['data'].pop('loading', None)
+    else:
+        config['data']['loading'] = copy.deepcopy(config['data'].get('loading') or {})
+        config['data']['loading']['chunksize'] = chunksize if mode == 'chunked' else None
+
+    rss_before = _peak_rss_mb()
+    loader = DataLoader(config)
+    result = {'mode': mode}
+    for name in ('claims', 'policies'):
+        start = time.perf_counter()
+        df = loader.load_csv(f'{name}.csv')
+        result[f'{name}_s'] = time.perf_counter() - start
+        result[f'{name}_mb'] = df.memory_usage(deep=True).sum() / 1024**2
+        del df
+    result['peak_rss_mb'] = _peak_rss_mb()
+    result['peak_rss_delta_mb'] = _peak_rss_mb() - rss_before
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    args = parser.parse_args()
+
+    ctx = mp.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        # Generate in a child too: ru_maxrss survives exec, so a large parent would skew every worker
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            pool.submit(write_files, args.rows, data_dir).result()
+        for mode in ('default', 'typed', 'chunked'):
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                results.append(pool.submit(run_mode, mode, data_dir, args.chunksize).result())
+
+    print(f"\nrows={args.rows} chunksize={args.chunksize}")
+    print(f"{'mode':<9}{'claims (s)':>12}{'claims (MB)':>13}{'policies (s)':>14}{'policies (MB)':>15}{'peak RSS (MB)':>15}{'RSS delta (MB)':>16}")
+    for r in results:
+        print(f"{r['mode']:<9}{r['claims_s']:>12.2f}{r['claims_mb']:>13.1f}{r['policies_s']:>14.2f}"
+              f"{r['policies_mb']:>15.1f}{r['peak_rss_mb']:>15.1f}{r['peak_rss_delta_mb']:>16.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Dense vs sparse vs hashing TF-IDF feature path: peak RSS and wall time.
+
+'hashing' is the sparse path with features.tfidf.mode = "hashing" (no fitted vocabulary).
+
+Each mode runs in a fresh process so ru_maxrss reflects only that mode.
+
+Usage (from the claims_complexity directory):
+    python -m benchmarks.bench_sparse_features --rows 100000 --model baseline
+"""
+import argparse
+import multiprocessing as mp
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _build_model(config, model_type):
+    if model_type == 'baseline':
+        from src.models.baseline import BaselineModel
+        return BaselineModel(config)
+    from src.models.advanced import AdvancedModel
+    return AdvancedModel(config, model_type=model_type)
+
+def run_mode(mode, n_rows, model_type, n_estimators):
+    import numpy as np
+    from src.utils.config import load_config
+    from src.features.engineering import FeatureEngineer
+    from src.features.text_features import TextFeatureEngineer
+    from src.features.sparse import hstack_features, sparse_nbytes
+    from benchmarks.synthetic import make_claims
+
+    config = load_config()
+    config['model']['baseline']['n_estimators'] = n_estimators
+    if mode == 'hashing':
+        config['features']['tfidf']['mode'] = 'hashing'
+    for params in config['model']['advanced'].values():
+        params['n_estimators'] = n_estimators
+
+    df = make_claims(n_rows)
+    y = df['ClaimComplexityLabel'].astype('category').cat.codes.to_numpy()
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    fe = FeatureEngineer(config)
+    tfe = TextFeatureEngineer(config)
+    df = fe.create_interaction_features(df)
+    df = tfe.extract_basic_text_features(df, 'Description')
+
+    if mode in ('sparse', 'hashing'):
+        tfidf, names, _ = tfe.fit_transform_tfidf_sparse(df, 'Description')
+        X, _ = hstack_features(df.select_dtypes(include=[np.number]), (tfidf, names))
+        matrix_mb = sparse_nbytes(X) / 1024**2
+    else:
+        df, _ = tfe.fit_transform_tfidf(df, 'Description')
+        df = df.copy()  # FeatureEngineer stages copy the frame after TF-IDF
+        X = df.select_dtypes(include=[np.number])
+        matrix_mb = X.memory_usage(deep=True).sum() / 1024**2
+    features_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = _build_model(config, model_type)
+    model.train(X, y)
+    fit_s = time.perf_counter() - start
+
+    return {
+        'mode': mode,
+        'features_s': features_s,
+        'fit_s': fit_s,
+        'matrix_mb': matrix_mb,
+        'peak_rss_mb': _peak_rss_mb(),
+        'peak_rss_delta_mb': _peak_rss_mb() - rss_before,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--model', choices=['baseline', 'xgboost', 'lightgbm'], default='baseline')
+    parser.add_argument('--n-estimators', type=int, default=50)
+    args = parser.parse_args()
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for mode in ('dense', 'sparse', 'hashing'):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results.append(pool.submit(run_mode, mode, args.rows, args.model, args.n_estimators).result())
+
+    print(f"\nrows={args.rows} model={args.model} n_estimators={args.n_estimators}")
+    print(f"{'mode':<8}{'features (s)':>14}{'fit (s)':>10}{'X (MB)':>10}{'peak RSS (MB)':>16}{'RSS delta (MB)':>16}")
+    for r in results:
+        print(f"{r['mode']:<8}{r['features_s']:>14.2f}{r['fit_s']:>10.2f}{r['matrix_mb']:>10.1f}"
+              f"{r['peak_rss_mb']:>16.1f}{r['peak_rss_delta_mb']:>16.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Compiled tree inference vs the library predictors: single-row and batch latency.
+
+Fits the RF baseline, XGBoost and LightGBM on synthetic claims features,
+compiles each with backend.common.utils.tree_inference and times
+predict_proba on the same rows with both, after checking that the compiled
+predictions match.
+
+Usage (from the claims_complexity directory, with the platform root on PYTHONPATH):
+    python -m benchmarks.bench_tree_inference --train-rows 20000 --models baseline xgboost lightgbm
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+def _time_ms(fn, X, repeats):
+    fn(X)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(np.array(timings) * 1000, 50)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--train-rows', type=int, default=20000)
+    parser.add_argument('--models', nargs='+', choices=['baseline', 'xgboost', 'lightgbm'],
+                        default=['baseline', 'xgboost', 'lightgbm'])
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 5000])
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    from src.utils.config import load_config
+    from src.features.pipeline import ClaimsFeaturePipeline
+    from benchmarks.synthetic import make_claims, make_policies
+    from backend.common.utils.tree_inference import compile_model
+
+    config = load_config()
+    config['model']['baseline']['n_estimators'] = args.n_estimators
+    for params in config['model']['advanced'].values():
+        params['n_estimators'] = args.n_estimators
+        params['early_stopping_rounds'] = None
+
+    n_policies = max(args.train_rows // 2, 1)
+    claims = make_claims(args.train_rows, n_policies=n_policies)
+    policies = make_policies(n_policies)
+    score_claims = make_claims(max(args.batch_sizes), n_policies=n_policies, seed=7)
+
+    pipeline = ClaimsFeaturePipeline(config)
+    X = pipeline.fit_transform(claims, policies)
+    y = pipeline.encode_target(claims[config['data']['target_col']])
+    X_score = pipeline.transform(score_claims, policies)
+    logging.disable(logging.INFO)
+
+    for model_type in args.models:
+        if model_type == 'baseline':
+            from src.models.baseline import BaselineModel
+            model = BaselineModel(config)
+        else:
+            from src.models.advanced import AdvancedModel
+            model = AdvancedModel(config, model_type=model_type)
+        model.train(X, y)
+        estimator = model.model
+
+        start = time.perf_counter()
+        compiled = compile_model(estimator)
+        compile_s = time.perf_counter() - start
+
+        expected, actual = estimator.predict_proba(X_score), compiled.predict_proba(X_score)
+        same_labels = np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1))
+        print(f"\nmodel={model_type} trees={compiled.n_trees_} nodes={compiled.n_nodes} depth={compiled.depth_} "
+              f"features={X.shape[1]} compile={compile_s:.2f}s labels_equal={same_labels} "
+              f"max_proba_diff={np.abs(expected - actual).max():.1e}")
+        print(f"{'batch':>8}{'library (ms)':>15}{'compiled (ms)':>15}{'speedup':>10}")
+        for batch_size in args.batch_sizes:
+            batch = X_score[:batch_size]
+            library_ms = _time_ms(estimator.predict_proba, batch, args.repeats)
+            compiled_ms = _time_ms(compiled.predict_proba, batch, args.repeats)
+            print(f"{batch_size:>8}{library_ms:>15.3f}{compiled_ms:>15.3f}{library_ms / compiled_ms:>9.1f}x")
+    logging.disable(logging.NOTSET)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Vocabulary mirrors the wording of data/raw/train_claims.csv descriptions
+CLAIM_TYPES = ['Collision', 'Fender-Bender', 'Theft/Comprehensive', 'Weather', 'Vandalism', 'Injury']
+VEHICLE_TYPES = ['Sedan', 'SUV', 'Truck', 'Coupe', 'Van']
+WORDS = [
+    'claim', 'involves', 'incident', 'vehicle', 'vehicles', 'single', 'multiple', 'parties',
+    'damage', 'damages', 'totaling', 'loss', 'amounting', 'minor', 'major', 'severe',
+    'collision', 'fender-bender', 'theft', 'comprehensive', 'weather', 'hail', 'flood',
+    'injury', 'injuries', 'reported', 'no', 'fortunately', 'hospital', 'passenger', 'driver',
+    'police', 'report', 'filed', 'witness', 'dispute', 'liability', 'fault', 'rear', 'front',
+    'bumper', 'windshield', 'airbag', 'deployed', 'towed', 'intersection', 'highway', 'parking',
+    'lot', 'stolen', 'recovered', 'attorney', 'litigation', 'rental', 'repair', 'estimate',
+    'total', 'frame', 'engine', 'glass', 'door', 'mirror', 'scratch', 'dent', 'night', 'rain',
+]
+LABELS = ['Simple', 'Moderate', 'Complex']
+
+def make_claims(n_rows, n_policies=None, seed=42, words_per_claim=(15, 45)):
+    """
+    Generate a synthetic claims frame with the same schema as train_claims.csv.
+    """
+    rng = np.random.default_rng(seed)
+    n_policies = n_policies or max(n_rows // 2, 1)
+
+    lengths = rng.integers(words_per_claim[0], words_per_claim[1], size=n_rows)
+    vocab = np.array(WORDS)
+    tokens = rng.choice(vocab, size=lengths.sum())
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    descriptions = [' '.join(tokens[offsets[i]:offsets[i + 1]]) for i in range(n_rows)]
+
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 2 * 365 * 24 * 60, size=n_rows), unit='m')
+
+    return pd.DataFrame({
+        'ClaimID': [f"CLM-{i:07d}" for i in range(n_rows)],
+        'PolicyID': [f"POL-{i:07d}" for i in rng.integers(0, n_policies, size=n_rows)],
+        'ClaimDate': dates.strftime('%Y/%m/%d %H:%M'),
+        'ClaimType': rng.choice(CLAIM_TYPES, size=n_rows),
+        'ReportedDamage': rng.gamma(2.0, 4000.0, size=n_rows),
+        'NumParties': rng.integers(1, 5, size=n_rows),
+        'Description': descriptions,
+        'ClaimComplexityLabel': rng.choice(LABELS, size=n_rows, p=[0.6, 0.3, 0.1]),
+        'FraudLabel': (rng.random(n_rows) < 0.05).astype(int),
+    })
+
+def make_policies(n_policies, seed=42):
+    """
+    Generate a synthetic policies frame with the same schema as train_policies_subset.csv.
+    """
+    rng = np.random.default_rng(seed + 1)
+    start = pd.Timestamp('2022-06-01') + pd.to_timedelta(rng.integers(0, 540, size=n_policies), unit='D')
+
+    return pd.DataFrame({
+        'PolicyID': [f"POL-{i:07d}" for i in range(n_policies)],
+        'HolderAge': rng.uniform(18, 85, size=n_policies).round(2),
+        'VehicleType': rng.choice(VEHICLE_TYPES, size=n_policies),
+        'AnnualMileage': rng.uniform(2000, 30000, size=n_policies).round(2),
+        'LocationUrban': rng.integers(0, 2, size=n_policies),
+        'CreditScore': rng.uniform(0.3, 0.95, size=n_policies).round(3),
+        'PolicyStart': start.strftime('%Y/%m/%d'),
+        'PolicyEnd': (start + pd.DateOffset(years=1)).strftime('%Y/%m/%d'),
+        'NextYearLoss': (rng.random(n_policies) < 0.1).astype(int),
+    })
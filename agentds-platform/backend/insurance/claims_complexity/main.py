@@ -2,205 +2,202 @@ import os
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 
 from src.utils.config import load_config
 from src.utils.logger import setup_logger, get_default_log_path
+from src.utils.dag import StageGraph
 from src.data.loader import DataLoader
 from src.data.validator import DataValidator
-from src.preprocessing.merging import DataMerger
-from src.preprocessing.cleaning import DataCleaner
-from src.models.baseline import BaselineModel
+from src.data.feature_store import FeatureStore
+from src.features.pipeline import ClaimsFeaturePipeline
 
-def main():
-    # 1. Load Configuration
-    config = load_config()
-    
-    # 2. Setup Logging
-    log_path = get_default_log_path(config)
-    logger = setup_logger("MainPipeline", log_file=log_path)
-    logger.info("Starting Auto Insurance Claims Complexity Prediction Pipeline")
-    
-    # 3. Load Data
-    loader = DataLoader(config)
-    data = loader.load_all_data()
-    
-    train_claims = data['train_claims']
-    train_policies = data['train_policies']
-    
-    if train_claims is None:
-        logger.error("Train claims data not found. Exiting.")
-        return
+def build_graph(config, loader, logger):
+    """
+    The training pipeline as a stage graph. Each stage names its inputs and
+    outputs; outputs are memoized in the feature store under keys chained
+    from the raw files and each stage's config, so a rerun only recomputes
+    what is downstream of a change. Stages without a dependency between them
+    (validation and preprocessing, text features and policy aggregates,
+    test-set features and model training) run concurrently.
+    """
+    store = FeatureStore(config)
+    graph = StageGraph(store, max_workers=config.get('pipeline', {}).get('max_workers', 4))
+    target_col = config['data']['target_col']
+    model_type = config.get('active_model', 'baseline') # 'baseline', 'xgboost', 'lightgbm', 'ensemble'
+
+    # 1-3. Raw inputs, fingerprinted by content; only read if a stage needs them
+    for name in ('train_claims', 'train_policies', 'test_claims', 'test_policies'):
+        path = loader.path(config['data'][name])
+        graph.source(name, lambda path=path, filename=config['data'][name]:
+                     loader.load_csv(filename) if os.path.exists(path) else None,
+                     key=store.fingerprint_files([path]))
 
     # 4. Validate Data
-    validator = DataValidator(config)
-    if not validator.run_all_checks(train_claims, train_policies):
-        logger.warning("Data validation failed or found issues. Proceeding with caution.")
-    
-    # 5. Merge Data
-    merger = DataMerger(config)
-    df = merger.merge_claims_policies(train_claims, train_policies)
-    
-    # 6. Clean Data
-    cleaner = DataCleaner(config)
-    df = cleaner.handle_missing_values(df)
-    
-    # 7. Feature Engineering
-    logger.info("Starting Feature Engineering...")
-    
-    # 7.1 Tabular Features
-    from src.features.engineering import FeatureEngineer
-    fe = FeatureEngineer(config)
-    df = fe.create_temporal_features(df, 'ClaimDate')
-    df = fe.create_interaction_features(df)
-    
-    # 7.2 Text Features
-    from src.features.text_features import TextFeatureEngineer
-    tfe = TextFeatureEngineer(config)
-    df = tfe.extract_basic_text_features(df, 'Description')
-    df, vectorizer = tfe.fit_transform_tfidf(df, 'Description')
-    
-    # 7.3 Aggregate Features
-    from src.features.aggregation import AggregateFeatureEngineer
-    afe = AggregateFeatureEngineer(config)
-    # Calculate aggregates from the original training claims (before split if possible, or just on current df)
-    # Ideally should be calculated on historical data, but here using current df
-    agg_df = afe.create_policy_aggregates(train_claims) # Use original claims data for aggregation source
-    df = afe.merge_aggregates(df, agg_df)
-    
-    # 7.4 Encode Categorical
-    df = fe.encode_categorical_features(df)
-    
-    # 8. Feature Selection for Modeling
-    target_col = config['data']['target_col']
-    
-    # Drop non-numeric and target columns for X
-    drop_cols = [target_col, config['data']['id_col'], config['data']['join_col'], 'ClaimDate', 'Description', 'ClaimType', 'VehicleType', 'PolicyStart', 'PolicyEnd']
-    # Also drop original categorical columns that were encoded (if any remained) or just select numeric
-    
-    X = df.drop(columns=[c for c in drop_cols if c in df.columns])
-    X = X.select_dtypes(include=[np.number]) # Final safety check
-    
-    logger.info(f"Final feature set shape: {X.shape}")
-    logger.info(f"Features: {X.columns.tolist()[:10]} ...")
-    
-    y = df[target_col]
-    
-    # Encode Target
-    le = LabelEncoder()
-    y_encoded = le.fit_transform(y)
-    logger.info(f"Target classes: {le.classes_}")
-    
+    def validate(train_claims, train_policies):
+        validator = DataValidator(config)
+        passed = validator.run_all_checks(train_claims, train_policies)
+        if not passed:
+            logger.warning("Data validation failed or found issues. Proceeding with caution.")
+        return passed
+
+    graph.stage('validation', validate, inputs=['train_claims', 'train_policies'])
+
+    # 5-7. Merge, Clean & Feature Engineering
+    # The fitted pieces are reassembled into one ClaimsFeaturePipeline, which
+    # holds the imputation values, TF-IDF vectorizer, policy aggregates and
+    # final column layout, and is saved with the model.
+    def preprocess(train_claims, train_policies):
+        pipeline = ClaimsFeaturePipeline(config)
+        processed = pipeline.fit_preprocess(train_claims, train_policies)
+        return processed, pipeline.get_state(pipeline.PREPROCESS_STATE)
+
+    def text_features(processed):
+        pipeline = ClaimsFeaturePipeline(config)
+        tfidf = pipeline.fit_text(processed)
+        return tfidf, pipeline.get_state(pipeline.TEXT_STATE)
+
+    def aggregates(train_claims):
+        return ClaimsFeaturePipeline(config).fit_aggregates(train_claims)
+
+    def features(processed, preprocess_state, tfidf, text_state, policy_aggregates, train_claims):
+        pipeline = ClaimsFeaturePipeline(config)
+        pipeline.set_state({**preprocess_state, **text_state, 'agg_store_': policy_aggregates})
+        X = pipeline.fit_encode(processed, tfidf)
+        # Encode Target (rows of X follow train_claims order)
+        y = pipeline.encode_target(train_claims[target_col])
+        logger.info(f"Final feature set shape: {X.shape}")
+        logger.info(f"Features: {pipeline.feature_names_[:10]} ...")
+        logger.info(f"Target classes: {pipeline.classes_}")
+        return X, y, pipeline
+
+    graph.stage('preprocess', preprocess, inputs=['train_claims', 'train_policies'],
+                outputs=['processed', 'preprocess_state'],
+                params={'data': config['data'], 'text_stats': config['features'].get('text_stats')})
+    graph.stage('text_features', text_features, inputs=['processed'],
+                outputs=['tfidf', 'text_state'], params=config['features']['tfidf'])
+    graph.stage('aggregates', aggregates, inputs=['train_claims'], outputs=['policy_aggregates'],
+                params=config['features'].get('aggregates'))
+    graph.stage('features', features,
+                inputs=['processed', 'preprocess_state', 'tfidf', 'text_state', 'policy_aggregates', 'train_claims'],
+                outputs=['X', 'y', 'pipeline'], params=config['features'])
+
     # 8. Train/Test Split
-    try:
-        if len(np.unique(y_encoded)) > 1:
-            X_train, X_val, y_train, y_val = train_test_split(
-                X, y_encoded, test_size=0.2, random_state=config['random_seed'], stratify=y_encoded
-            )
-        else:
-             # Fallback for single class
-             X_train, X_val, y_train, y_val = X, X, y_encoded, y_encoded
-    except ValueError:
-        logger.warning("Stratified split failed (likely too few samples per class). Falling back to random split.")
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y_encoded, test_size=0.2, random_state=config['random_seed']
-        )
-    
-    # ... (Feature selection block remains) ...
-    
+    def split(X, y_encoded):
+        try:
+            if len(np.unique(y_encoded)) > 1:
+                return train_test_split(
+                    X, y_encoded, test_size=0.2, random_state=config['random_seed'], stratify=y_encoded
+                )
+            # Fallback for single class
+            return X, X, y_encoded, y_encoded
+        except ValueError:
+            logger.warning("Stratified split failed (likely too few samples per class). Falling back to random split.")
+            return train_test_split(X, y_encoded, test_size=0.2, random_state=config['random_seed'])
+
+    graph.stage('split', split, inputs=['X', 'y'], outputs=['X_train', 'X_val', 'y_train', 'y_val'],
+                params={'random_seed': config['random_seed']}, cache=False)
+
     # 9. Model Selection & Training
-    model_type = config.get('active_model', 'baseline') # 'baseline', 'xgboost', 'lightgbm'
     run_tuning = config.get('run_tuning', False)
-    
-    if run_tuning and model_type in ['xgboost', 'lightgbm']:
+
+    def tune(X_train, y_train):
+        if not (run_tuning and model_type in ['xgboost', 'lightgbm']):
+            return {}
         from src.models.tuning import HyperparameterTuner
         tuner = HyperparameterTuner(config, X_train, y_train)
-        best_params = tuner.tune(model_type, n_trials=10)
-        # Update config with best params (in memory)
-        config['model']['advanced'][model_type].update(best_params)
-    
-    if model_type == 'baseline':
-        from src.models.baseline import BaselineModel
-        model = BaselineModel(config)
-    elif model_type in ['xgboost', 'lightgbm']:
-        from src.models.advanced import AdvancedModel
-        model = AdvancedModel(config, model_type=model_type)
-    elif model_type == 'ensemble':
-        from src.models.ensemble import EnsembleModel
-        model = EnsembleModel(config)
-    else:
-        logger.error(f"Unknown model type: {model_type}")
-        return
+        return tuner.tune(model_type, n_trials=config.get('tuning', {}).get('n_trials', 10))
+
+    def train(X_train, y_train, X_val, y_val, best_params):
+        if model_type in ['xgboost', 'lightgbm']:
+            # Update config with best params (in memory)
+            config['model']['advanced'][model_type].update(best_params)
+
+        if model_type == 'baseline':
+            from src.models.baseline import BaselineModel
+            model = BaselineModel(config)
+        elif model_type in ['xgboost', 'lightgbm']:
+            from src.models.advanced import AdvancedModel
+            model = AdvancedModel(config, model_type=model_type)
+        elif model_type == 'ensemble':
+            from src.models.ensemble import EnsembleModel
+            model = EnsembleModel(config, oof_store=store)
+        else:
+            raise ValueError(f"Unknown model type: {model_type}")
+
+        model.train(X_train, y_train, X_val, y_val)
+        return model
+
+    graph.stage('tuning', tune, inputs=['X_train', 'y_train'], outputs=['best_params'],
+                params={'run_tuning': run_tuning, 'active_model': model_type, 'random_seed': config['random_seed'],
+                        'tuning': config.get('tuning')})
+    graph.stage('train', train, inputs=['X_train', 'y_train', 'X_val', 'y_val', 'best_params'], outputs=['model'],
+                params={'active_model': model_type, 'model': config['model'], 'random_seed': config['random_seed']})
 
-    model.train(X_train, y_train, X_val, y_val)
-    
     # 10. Evaluation
-    results = model.evaluate(X_val, y_val)
-    
+    graph.stage('evaluate', lambda model, X_val, y_val: model.evaluate(X_val, y_val),
+                inputs=['model', 'X_val', 'y_val'], outputs=['results'], cache=False)
+
     # 11. Error Analysis
-    from src.evaluation.analysis import ErrorAnalyzer
-    analyzer = ErrorAnalyzer(config)
-    try:
-        if hasattr(model, 'model'): # Unwrap for some custom classes if needed, or DuckTyping
-            # Our wrappers usually expose predict, but getting feature importance might require the underlying model
-            pass
-        
-        analyzer.analyze_errors(model, X_val, y_val, le.classes_)
-        # Feature importance might not work for Ensemble or generic wrappers without extra logic
-        if model_type not in ['ensemble']: 
-             # Try to get underlying model for feature importance
-             underlying = model.model if hasattr(model, 'model') else model
-             analyzer.plot_feature_importance(underlying, X.columns)
-    except Exception as e:
-        logger.warning(f"Error analysis (optional) failed: {e}")
-
-    # Save Model
-    model.save(f"{model_type}_model.joblib")
-    
+    def error_analysis(model, X_val, y_val, pipeline):
+        from src.evaluation.analysis import ErrorAnalyzer
+        analyzer = ErrorAnalyzer(config)
+        try:
+            analyzer.analyze_errors(model, X_val, y_val, pipeline.classes_)
+            # Feature importance might not work for Ensemble or generic wrappers without extra logic
+            if model_type not in ['ensemble']:
+                # Try to get underlying model for feature importance
+                underlying = model.model if hasattr(model, 'model') else model
+                analyzer.plot_feature_importance(underlying, pipeline.feature_names_)
+        except Exception as e:
+            logger.warning(f"Error analysis (optional) failed: {e}")
+
+    graph.stage('error_analysis', error_analysis, inputs=['model', 'X_val', 'y_val', 'pipeline'], cache=False)
+
+    # Save Model and the fitted feature pipeline next to it
+    def save_artifacts(model, pipeline):
+        model.save(f"{model_type}_model.joblib")
+        pipeline.save(f"{model_type}_feature_pipeline.joblib")
+
+    graph.stage('save_artifacts', save_artifacts, inputs=['model', 'pipeline'], cache=False)
+
     # 12. Inference on Test Set (if available)
-    test_claims = data['test_claims']
-    test_policies = data['test_policies']
-    
-    if test_claims is not None:
+    def test_features(pipeline, test_claims, test_policies):
+        if test_claims is None:
+            return None
         logger.info("Processing Test Set for Submission...")
-        
-        # Merge
-        df_test = merger.merge_claims_policies(test_claims, test_policies)
-        # Clean
-        df_test = cleaner.handle_missing_values(df_test)
-        
-        # Feature Engineering (Must reuse the same objects if they hold state, but here they are mostly stateless approx)
-        # Ideally, we should fit transformers on train and transform test. 
-        # Using the same `fe`, `tfe` instances etc.
-        # Tabular
-        df_test = fe.create_temporal_features(df_test, 'ClaimDate')
-        df_test = fe.create_interaction_features(df_test)
-        
-        # Text - Use the SAME vectorizer fitted on train
-        df_test = tfe.extract_basic_text_features(df_test, 'Description')
-        df_test = tfe.transform_tfidf(df_test, 'Description', vectorizer=vectorizer)
-        
-        # Aggregates - Map from training aggregates or re-calculate if appropriate?
-        # Usually we map from training knowledge. 
-        # Here `agg_df` was computed on `train_claims`. We merge it into test.
-        df_test = afe.merge_aggregates(df_test, agg_df)
-        
-        # Encode
-        df_test = fe.encode_categorical_features(df_test)
-        
-        # Align Features (Ensure test has same columns as train X)
-        missing_cols = set(X.columns) - set(df_test.columns)
-        for c in missing_cols:
-            df_test[c] = 0
-            
-        # Select features
-        X_test_final = df_test[X.columns]
-        
+        return pipeline.transform(test_claims, test_policies)
+
+    def submission(model, X_test_final, test_claims, pipeline):
+        if test_claims is None:
+            return None
         # Generate Submission
         from src.evaluation.submission import generate_submission
         test_ids = test_claims[config['data']['id_col']]
-        generate_submission(model, X_test_final, test_ids, le.classes_, output_dir=config['paths']['outputs'])
-        
+        generate_submission(model, X_test_final, test_ids, pipeline.classes_, output_dir=config['paths']['outputs'])
+
+    graph.stage('test_features', test_features, inputs=['pipeline', 'test_claims', 'test_policies'],
+                outputs=['X_test_final'])
+    graph.stage('submission', submission, inputs=['model', 'X_test_final', 'test_claims', 'pipeline'], cache=False)
+
+    return graph
+
+def main():
+    # 1. Load Configuration
+    config = load_config()
+
+    # 2. Setup Logging
+    log_path = get_default_log_path(config)
+    logger = setup_logger("MainPipeline", log_file=log_path)
+    logger.info("Starting Auto Insurance Claims Complexity Prediction Pipeline")
+
+    loader = DataLoader(config)
+    if not os.path.exists(loader.path(config['data']['train_claims'])):
+        logger.error("Train claims data not found. Exiting.")
+        return
+
+    graph = build_graph(config, loader, logger)
+    graph.run(['validation', 'results', 'error_analysis', 'save_artifacts', 'submission'])
+
     logger.info("Pipeline execution finished successfully.")
 
 if __name__ == "__main__":
@@ -1,5 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from backend.common.schemas.base import BaseResponse
+from backend.common.utils.executor import model_executor, PoolSaturatedError
+from backend.insurance.claims_complexity.schemas import ClaimsBatch, ClaimsPredictionOutput
+from backend.insurance.claims_complexity.service import service
+import logging
+
+logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------
 # ROUTER CONFIGURATION
@@ -31,19 +37,35 @@ async def health_check():
     )
 
 @router.post("/predict", response_model=BaseResponse)
-async def predict(payload: dict):
+async def predict(payload: ClaimsBatch):
     """
     Main inference endpoint for Claims Complexity.
     
     Payload:
-        Claim details (e.g., {'diagnosis_codes': [], 'cost': ...})
+        A batch of claims (plus optional policies), scored in one vectorized pass.
     
     Returns:
-        Complexity score or classification.
+        Complexity label and class probabilities per claim.
     """
-    return BaseResponse(
-        success=True,
-        message="Prediction placeholder",
-        data={"complexity_level": "medium", "estimated_handling_time_days": 5},
-        metadata={"note": "This is a dummy response. Implement ML logic."}
-    )
+    try:
+        preds, proba, classes = await model_executor.run(service.predict, payload.claims, payload.policies)
+        return BaseResponse(
+            success=True,
+            message="Prediction successful",
+            data=ClaimsPredictionOutput(
+                predictions=preds,
+                probabilities=proba,
+                classes=classes,
+                model_version=service.model_version
+            ),
+            metadata={"n_claims": len(preds)}
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=400, detail="Model not trained. Run claims_complexity/main.py first.")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Any
+
+# -----------------------------------------------------------------------------
+# INPUT SCHEMAS
+# -----------------------------------------------------------------------------
+
+class ClaimsBatch(BaseModel):
+    claims: List[Dict[str, Any]] = Field(..., description="Claim records (ClaimID, PolicyID, ClaimDate, ClaimType, ReportedDamage, NumParties, Description, ...)")
+    policies: Optional[List[Dict[str, Any]]] = Field(None, description="Policy records joined on PolicyID. Omit if policy fields are already inlined in each claim.")
+
+# -----------------------------------------------------------------------------
+# OUTPUT SCHEMAS
+# -----------------------------------------------------------------------------
+
+class ClaimsPredictionOutput(BaseModel):
+    predictions: List[str]
+    probabilities: List[List[float]]
+    classes: List[str]
+    model_version: Optional[str] = None
@@ -0,0 +1,139 @@
+import importlib
+import importlib.abc
+import importlib.util
+import os
+import sys
+import threading
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from backend.common.utils.io import load_artifact
+from backend.common.utils.lifecycle import service_registry
+from backend.common.utils.tree_inference import inference_model
+from backend.insurance.claims_complexity.src.utils.config import load_config, get_full_path
+from backend.insurance.claims_complexity.src.features.pipeline import ClaimsFeaturePipeline
+
+logger = logging.getLogger(__name__)
+
+CLAIMS_ROOT = Path(__file__).resolve().parent
+CONFIG_PATH = CLAIMS_ROOT / "config" / "config.yaml"
+SERVICE_NAME = "insurance.claims_complexity"
+SRC_PACKAGE = "backend.insurance.claims_complexity.src"
+
+class _AliasLoader(importlib.abc.Loader):
+    def __init__(self, target):
+        self.target = target
+
+    def create_module(self, spec):
+        return importlib.import_module(self.target)
+
+    def exec_module(self, module):
+        pass
+
+class _SrcAliasFinder(importlib.abc.MetaPathFinder):
+    """Resolves `src` and `src.*` to the claims package under its namespaced name."""
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname == "src" or fullname.startswith("src."):
+            return importlib.util.spec_from_loader(fullname, _AliasLoader(SRC_PACKAGE + fullname[len("src"):]))
+        return None
+
+@contextmanager
+def _claims_src_modules():
+    """
+    main.py runs from this folder and imports the claims code as the top-level
+    `src` package, so its pickles reference `src.*` modules. While unpickling
+    them, map those names onto the namespaced package; afterwards no `src`
+    module is left in the process for other packages to collide with.
+    """
+    finder = _SrcAliasFinder()
+    sys.meta_path.insert(0, finder)
+    try:
+        yield
+    finally:
+        sys.meta_path.remove(finder)
+        for name in [name for name in sys.modules if name == "src" or name.startswith("src.")]:
+            if sys.modules[name].__name__.startswith(SRC_PACKAGE):
+                del sys.modules[name]
+
+class ClaimsComplexityService:
+    """
+    Serves the model and fitted feature pipeline written by main.py.
+
+    Artifacts are loaded once (at application startup) and every request is
+    scored as one batch: a single pipeline.transform and a single predict_proba.
+    Tree models are compiled to array form at load time when
+    AGENTDS_TREE_BACKEND(_INSURANCE_CLAIMS_COMPLEXITY) is "compiled". The model
+    is loaded with AGENTDS_ARTIFACT_MMAP, which only shares plain-array models
+    between workers (see load_artifact).
+    """
+    def __init__(self, model_type=None, models_dir=None):
+        self.model_type = model_type
+        self.models_dir = models_dir
+        self.model = None
+        self.pipeline = None
+        self.model_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self.model is not None and self.pipeline is not None
+
+    def load(self):
+        with self._lock:
+            if self.is_loaded:
+                return
+
+            config = load_config(str(CONFIG_PATH))
+            model_type = self.model_type or config.get('active_model', 'baseline')
+            models_dir = self.models_dir or get_full_path(config['paths']['models'])
+            model_path = os.path.join(models_dir, f"{model_type}_model.joblib")
+            pipeline_path = os.path.join(models_dir, f"{model_type}_feature_pipeline.joblib")
+
+            for path in (model_path, pipeline_path):
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Artifact not found at {path}")
+
+            with _claims_src_modules():
+                self.pipeline = ClaimsFeaturePipeline.load(pipeline_path)
+                model = load_artifact(Path(model_path))
+            self.model = inference_model(model, SERVICE_NAME, artifact_path=Path(model_path))
+            self.model_version = f"{model_type}-{int(os.path.getmtime(model_path))}"
+            logger.info(f"Claims Complexity model loaded: {self.model_version}")
+
+    def load_resources(self):
+        self.load()
+
+    def warmup(self):
+        """
+        Scores the sample claim kept by the pipeline at fit time.
+        Returns False for pipelines saved without one.
+        """
+        self.load()
+        sample = getattr(self.pipeline, 'sample_record_', None)
+        if not sample:
+            return False
+        self.predict(sample)
+        return True
+
+    def predict(self, claims: list, policies: list = None):
+        self.load()
+
+        join_col = self.pipeline.join_col
+        claims_df = pd.DataFrame(claims)
+        if join_col not in claims_df.columns:
+            raise ValueError(f"Every claim must include '{join_col}'")
+        policies_df = pd.DataFrame(policies) if policies else None
+
+        X = self.pipeline.transform(claims_df, policies_df)
+        proba = self.model.predict_proba(X)
+
+        # Probability columns follow model.classes_ (encoded labels)
+        classes = self.pipeline.decode_target(self.model.classes_)
+        labels = classes[proba.argmax(axis=1)]
+        return labels.tolist(), proba.tolist(), classes.tolist()
+
+service = ClaimsComplexityService()
+service_registry.register(SERVICE_NAME, service)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+try:
+    import joblib
+except ImportError:
+    from sklearn.externals import joblib
+from ..utils.config import get_full_path
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bump when stage code changes in a way that invalidates stored outputs
+STORE_VERSION = 1
+
+class FeatureStore:
+    """
+    Disk cache for the outputs of claims pipeline stages.
+
+    Every entry is addressed by a key derived from the stage name, the
+    config section that drives the stage, and the keys (or input
+    fingerprints) it was computed from, so changing the data or the stage
+    config produces a new key instead of a stale hit. DataFrames are stored
+    as Parquet, sparse matrices as .npz, and fitted state (e.g. the feature
+    pipeline) with joblib. The 'processed' stage lives under
+    paths.processed_data, every other stage under paths.features.
+    """
+    PROCESSED_STAGES = ['processed']
+
+    def __init__(self, config):
+        self.config = config
+        self.enabled = config.get('feature_store', {}).get('enabled', True)
+        self.processed_dir = get_full_path(config['paths']['processed_data'])
+        self.features_dir = get_full_path(config['paths']['features'])
+
+    @staticmethod
+    def fingerprint_files(paths):
+        """
+        Content hash of input files; missing files hash as absent.
+        """
+        digest = hashlib.sha256()
+        for path in paths:
+            if path is None or not os.path.exists(path):
+                digest.update(b'<missing>')
+                continue
+            digest.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()[:20]
+
+    @staticmethod
+    def fingerprint_frame(df):
+        """
+        Content hash of an in-memory DataFrame (values, index, columns and dtypes).
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        return digest.hexdigest()[:20]
+
+    @staticmethod
+    def fingerprint_matrix(X):
+        """
+        Content hash of a feature matrix: DataFrame, scipy sparse matrix or ndarray.
+        """
+        if isinstance(X, pd.DataFrame):
+            return FeatureStore.fingerprint_frame(X)
+        digest = hashlib.sha256(str((type(X).__name__, X.shape, str(X.dtype))).encode())
+        if sp.issparse(X):
+            X = X.tocsr()
+            for part in (X.data, X.indices, X.indptr):
+                digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(np.ascontiguousarray(X).tobytes())
+        return digest.hexdigest()[:20]
+
+    @staticmethod
+    def stage_key(stage, params, *parents):
+        """
+        Key for `stage` computed with config `params` from the `parents` keys.
+        """
+        payload = json.dumps({'version': STORE_VERSION, 'stage': stage, 'params': params, 'parents': list(parents)},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+    def exists(self, stage, key):
+        return self.enabled and os.path.exists(self._base_path(stage, key) + '.done')
+
+    def load(self, stage, key):
+        """
+        Returns {'data': ..., 'state': ...} for a stored entry, or None on a miss.
+        """
+        if not self.exists(stage, key):
+            return None
+        base = self._base_path(stage, key)
+
+        start = time.perf_counter()
+        entry = {'data': None, 'state': None}
+        if os.path.exists(base + '.parquet'):
+            entry['data'] = pd.read_parquet(base + '.parquet')
+        elif os.path.exists(base + '.npz'):
+            entry['data'] = sp.load_npz(base + '.npz').tocsr()
+        if os.path.exists(base + '.state.joblib'):
+            entry['state'] = joblib.load(base + '.state.joblib')
+        logger.info(f"Feature store hit: {stage}/{key} loaded in {time.perf_counter() - start:.2f}s")
+        return entry
+
+    def save(self, stage, key, data=None, state=None):
+        """
+        Store a stage output. `data` is a DataFrame or scipy sparse matrix,
+        `state` any picklable object saved alongside it.
+        """
+        if not self.enabled:
+            return
+        base = self._base_path(stage, key)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+
+        if isinstance(data, pd.DataFrame):
+            data.to_parquet(base + '.parquet')
+        elif sp.issparse(data):
+            sp.save_npz(base + '.npz', data.tocsr(), compressed=False)
+        elif data is not None:
+            raise TypeError(f"Unsupported feature store data type: {type(data).__name__}")
+        if state is not None:
+            joblib.dump(state, base + '.state.joblib')
+
+        # Written last: an interrupted save is never read back as a hit
+        with open(base + '.done', 'w') as f:
+            json.dump({'stage': stage, 'key': key, 'created_at': time.time()}, f)
+        logger.info(f"Feature store saved {stage}/{key}")
+
+    def save_value(self, stage, key, value):
+        """Store a single value: frames and sparse matrices as data, anything else as state."""
+        if isinstance(value, pd.DataFrame) or sp.issparse(value):
+            self.save(stage, key, data=value)
+        else:
+            self.save(stage, key, state=value)
+
+    def load_value(self, stage, key):
+        entry = self.load(stage, key)
+        if entry is None:
+            raise KeyError(f"{stage}/{key} is not in the feature store")
+        return entry['data'] if entry['data'] is not None else entry['state']
+
+    def _base_path(self, stage, key):
+        root = self.processed_dir if stage in self.PROCESSED_STAGES else self.features_dir
+        return os.path.join(root, stage, key)
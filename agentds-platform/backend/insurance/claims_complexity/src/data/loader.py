@@ -1,7 +1,10 @@
 import pandas as pd
+from pandas.api.types import union_categoricals
+import csv
 import os
-from src.utils.config import get_full_path
-from src.utils.logger import setup_logger
+import time
+from ..utils.config import get_full_path
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -9,22 +12,87 @@ class DataLoader:
     def __init__(self, config):
         self.config = config
         self.raw_dir = config['paths']['raw_data']
+        # Optional typed loading: dtype schema, numeric downcasting, engine and chunking
+        self.loading = config['data'].get('loading')
         
+    def path(self, filename):
+        """Absolute path of a file in the raw data directory."""
+        return get_full_path(os.path.join(self.raw_dir, filename))
+
     def load_csv(self, filename):
         """
         Load a CSV file from the raw data directory.
+        With `data.loading` configured, columns get their schema dtypes, remaining
+        numerics are downcast, and with `chunksize` the file is parsed in chunks.
+        The whole file still ends up in one frame, so it must fit in memory;
+        iterate iter_csv instead to process larger files chunk by chunk.
         """
-        path = get_full_path(os.path.join(self.raw_dir, filename))
+        path = self.path(filename)
         if not os.path.exists(path):
             logger.error(f"File not found: {path}")
             raise FileNotFoundError(f"File not found: {path}")
             
         logger.info(f"Loading data from {path}")
-        df = pd.read_csv(path)
-        logger.info(f"Loaded {len(df)} rows and {len(df.columns)} columns from {filename}")
-        logger.debug(f"Memory usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+        start = time.perf_counter()
+        if self.loading is None:
+            df = pd.read_csv(path)
+        elif self.loading.get('chunksize'):
+            df = self._concat_chunks(self.iter_csv(filename))
+        else:
+            df = self._downcast(pd.read_csv(path, **self._read_options(path)))
+
+        memory_mb = df.memory_usage(deep=True).sum() / 1024**2
+        logger.info(f"Loaded {len(df)} rows and {len(df.columns)} columns from {filename} "
+                    f"in {time.perf_counter() - start:.2f}s ({memory_mb:.2f} MB in memory, "
+                    f"{os.path.getsize(path) / 1024**2:.2f} MB on disk)")
         return df
 
+    def iter_csv(self, filename):
+        """
+        Stream a CSV in typed chunks of `data.loading.chunksize` rows. Only
+        consumers that reduce each chunk (PolicyAggregateStore.update,
+        HashingTfidfVectorizer.partial_fit) keep memory bounded by the chunk size.
+        """
+        path = self.path(filename)
+        options = self._read_options(path)
+        # The pyarrow engine parses whole files; streaming needs the C engine
+        options['engine'] = 'c'
+        with pd.read_csv(path, chunksize=(self.loading or {}).get('chunksize') or 100_000, **options) as reader:
+            for chunk in reader:
+                yield self._downcast(chunk)
+
+    def _read_options(self, path):
+        loading = self.loading or {}
+        with open(path, newline='') as f:
+            header = next(csv.reader(f), [])
+        schema = loading.get('schema') or {}
+        options = {'dtype': {col: dtype for col, dtype in schema.items() if col in header}}
+        engine = loading.get('engine')
+        if engine:
+            options['engine'] = engine
+        return options
+
+    def _downcast(self, df):
+        if not (self.loading or {}).get('downcast_numerics'):
+            return df
+        schema = self.loading.get('schema') or {}
+        for col in df.select_dtypes(include=['integer']).columns.difference(list(schema)):
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+        for col in df.select_dtypes(include=['floating']).columns.difference(list(schema)):
+            df[col] = pd.to_numeric(df[col], downcast='float')
+        return df
+
+    def _concat_chunks(self, chunks):
+        chunks = list(chunks)
+        if not chunks:
+            return pd.DataFrame()
+        # Chunks see different category sets; unify them so concat keeps categoricals
+        for col in chunks[0].select_dtypes(include=['category']).columns:
+            categories = union_categoricals([chunk[col] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+        return pd.concat(chunks, ignore_index=True)
+
     def load_all_data(self):
         """
         Load all claims and policies data (train and test if available).
@@ -47,7 +115,7 @@ class DataLoader:
         return data
 
 if __name__ == "__main__":
-    from src.utils.config import load_config
+    from ..utils.config import load_config
     config = load_config()
     loader = DataLoader(config)
     data = loader.load_all_data()
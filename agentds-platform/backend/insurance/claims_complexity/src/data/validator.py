@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -105,8 +105,8 @@ class DataValidator:
         return all([s1, d1, r1, s2, d2, r2, l1])
 
 if __name__ == "__main__":
-    from src.data.loader import DataLoader
-    from src.utils.config import load_config
+    from .loader import DataLoader
+    from ..utils.config import load_config
     config = load_config()
     loader = DataLoader(config)
     data = loader.load_all_data()
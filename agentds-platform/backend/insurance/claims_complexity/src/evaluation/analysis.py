@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from src.utils.logger import setup_logger
+from scipy import sparse
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -17,8 +18,11 @@ class ErrorAnalyzer:
         logger.info("Starting Error Analysis...")
         y_pred = model.predict(X_test)
         
-        # Create a dataframe of errors
-        results = X_test.copy()
+        # Create a dataframe of errors (sparse features are not copied into the report)
+        if sparse.issparse(X_test):
+            results = pd.DataFrame(index=range(X_test.shape[0]))
+        else:
+            results = X_test.copy()
         results['Actual'] = y_test
         results['Predicted'] = y_pred
         results['Actual_Label'] = [le_classes[i] for i in y_test]
@@ -1,7 +1,7 @@
 import pandas as pd
 import os
 import numpy as np
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
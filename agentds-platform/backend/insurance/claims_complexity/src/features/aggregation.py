@@ -1,32 +1,308 @@
+import numpy as np
 import pandas as pd
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+def _moment_features(n_claims, n_values, sums, sum_sq):
+    """Claim count and mean / sample std of the damage from running counts and sums."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(n_values > 0, sums / n_values, 0.0)
+        # Sample variance from the running sums; clipped against rounding below zero
+        var = np.where(n_values > 1, (sum_sq - sums * mean) / (n_values - 1), 0.0)
+    return {'count': np.asarray(n_claims, dtype=float), 'mean': mean, 'std': np.sqrt(np.clip(var, 0, None))}
+
+class PolicyAggregateStore:
+    """
+    Running per-policy statistics of the claims history.
+
+    Keeps, per PolicyID, the claim count and the count, sum, sum of squares
+    and max of `ReportedDamage`, plus the latest claim date, in flat arrays.
+    `update` folds a new batch of claims in with one grouped pass over the
+    batch only; `lookup` answers any number of PolicyIDs with one hash-index
+    probe each, so nothing is recomputed from the whole history.
+
+    `stats` selects the features served: count, mean, max, std (sample) and
+    recency (days from the policy's latest claim to the latest claim in the
+    store).
+    """
+    STATS = {
+        'count': 'Policy_ClaimCount',
+        'mean': 'Policy_AvgDamage',
+        'max': 'Policy_MaxDamage',
+        'std': 'Policy_StdDamage',
+        'recency': 'Policy_DaysSinceLastClaim',
+    }
+    # Served for policies without claim history
+    MISSING = {'recency': -1.0}
+
+    def __init__(self, stats=('count', 'mean'), key_col='PolicyID', value_col='ReportedDamage', date_col='ClaimDate'):
+        unknown = set(stats) - set(self.STATS)
+        if unknown:
+            raise ValueError(f"Unknown policy aggregate statistics: {sorted(unknown)}")
+        self.stats = list(stats)
+        self.key_col = key_col
+        self.value_col = value_col
+        self.date_col = date_col
+
+        self.index_ = pd.Index([], dtype=object)
+        self.n_claims_ = np.zeros(0, dtype=np.int64)
+        self.n_values_ = np.zeros(0, dtype=np.int64)
+        self.sum_ = np.zeros(0)
+        self.sum_sq_ = np.zeros(0)
+        self.max_ = np.zeros(0)
+        self.last_date_ = np.zeros(0, dtype='datetime64[ns]')
+
+    @property
+    def columns(self):
+        return [self.STATS[stat] for stat in self.stats]
+
+    def __len__(self):
+        return len(self.index_)
+
+    def update(self, claims_df):
+        """Fold a batch of claims into the running statistics. Returns self."""
+        if self.key_col not in claims_df.columns:
+            return self
+
+        values = pd.to_numeric(claims_df[self.value_col], errors='coerce') if self.value_col in claims_df.columns \
+            else pd.Series(np.nan, index=claims_df.index)
+        dates = pd.to_datetime(claims_df[self.date_col], errors='coerce') if self.date_col in claims_df.columns \
+            else pd.Series(pd.NaT, index=claims_df.index)
+        batch = pd.DataFrame({'key': claims_df[self.key_col].to_numpy(), 'value': values.to_numpy(),
+                              'value_sq': values.to_numpy() ** 2, 'date': dates.to_numpy()})
+        batch = batch[batch['key'].notna()]
+
+        grouped = batch.groupby('key', sort=False).agg(
+            n_claims=('value', 'size'), n_values=('value', 'count'), sum=('value', 'sum'),
+            sum_sq=('value_sq', 'sum'), max=('value', 'max'), last_date=('date', 'max'))
+
+        # New policies get fresh slots at the end
+        new_keys = grouped.index.difference(self.index_, sort=False)
+        if len(new_keys):
+            n_new = len(new_keys)
+            self.index_ = self.index_.append(new_keys) if len(self.index_) else new_keys
+            self.n_claims_ = np.concatenate([self.n_claims_, np.zeros(n_new, dtype=np.int64)])
+            self.n_values_ = np.concatenate([self.n_values_, np.zeros(n_new, dtype=np.int64)])
+            self.sum_ = np.concatenate([self.sum_, np.zeros(n_new)])
+            self.sum_sq_ = np.concatenate([self.sum_sq_, np.zeros(n_new)])
+            self.max_ = np.concatenate([self.max_, np.full(n_new, np.nan)])
+            self.last_date_ = np.concatenate([self.last_date_, np.full(n_new, np.datetime64('NaT'), 'datetime64[ns]')])
+
+        slots = self.index_.get_indexer(grouped.index)
+        self.n_claims_[slots] += grouped['n_claims'].to_numpy()
+        self.n_values_[slots] += grouped['n_values'].to_numpy()
+        self.sum_[slots] += grouped['sum'].to_numpy()
+        self.sum_sq_[slots] += grouped['sum_sq'].to_numpy()
+        self.max_[slots] = np.fmax(self.max_[slots], grouped['max'].to_numpy(dtype=float))
+        self.last_date_[slots] = np.fmax(self.last_date_[slots], grouped['last_date'].to_numpy(dtype='datetime64[ns]'))
+
+        logger.info(f"Policy aggregates updated with {len(batch)} claims "
+                    f"({len(grouped)} policies, {len(new_keys)} new; {len(self)} in store)")
+        return self
+
+    def lookup(self, policy_ids):
+        """
+        Aggregate features for each of `policy_ids`, in order, as a frame
+        indexed like `policy_ids` (a Series) or by position.
+        """
+        index = policy_ids.index if isinstance(policy_ids, pd.Series) else None
+        slots = self.index_.get_indexer(pd.Index(policy_ids))
+        found = slots >= 0
+        features = self._features(slots[found])
+
+        out = {}
+        for stat, column in zip(self.stats, self.columns):
+            values = np.full(len(slots), self.MISSING.get(stat, 0.0))
+            values[found] = features[stat]
+            out[column] = values
+        return pd.DataFrame(out, index=index)
+
+    def frame(self):
+        """All policies in the store as a frame: key column plus one column per statistic."""
+        features = self._features(np.arange(len(self)))
+        df = pd.DataFrame({column: features[stat] for stat, column in zip(self.stats, self.columns)})
+        df.insert(0, self.key_col, self.index_.to_numpy())
+        return df
+
+    def transform(self, df):
+        """Aggregate features for the rows of `df`, by their policy."""
+        return self.lookup(df[self.key_col])
+
+    def _features(self, slots):
+        features = _moment_features(self.n_claims_[slots], self.n_values_[slots], self.sum_[slots], self.sum_sq_[slots])
+        features['max'] = np.nan_to_num(self.max_[slots])
+        if 'recency' in self.stats:
+            reference = self.last_date_.max() if len(self) else np.datetime64('NaT')
+            days = (reference - self.last_date_[slots]) / np.timedelta64(1, 'D')
+            features['recency'] = np.where(np.isnan(days), self.MISSING['recency'], days)
+        return features
+
+class PointInTimeAggregates:
+    """
+    Point-in-time policy aggregates: every claim only sees the claims of its
+    policy dated strictly before its own ClaimDate, so a training row never
+    sees itself or later claims, and a scored claim sees the history up to
+    its date.
+
+    The history is kept sorted by date with per-policy running counts, sums,
+    sums of squares and maxima. A claim's lifetime statistics (`stats`, as in
+    PolicyAggregateStore; recency is the number of days since the policy's
+    previous claim) come from one `merge_asof` of the claims against the
+    history at ClaimDate; the statistics over each of the `windows` (days)
+    are the difference between that match and a second one at
+    ClaimDate - window. Apart from the sorts, the cost is linear in the
+    number of claims, with no per-row filtering.
+    """
+    WINDOW_STATS = ('count', 'mean', 'std')
+
+    def __init__(self, stats=('count', 'mean'), windows=(30, 90, 365), window_stats=('count', 'mean'),
+                 key_col='PolicyID', value_col='ReportedDamage', date_col='ClaimDate'):
+        unknown = (set(stats) - set(PolicyAggregateStore.STATS)) | (set(window_stats) - set(self.WINDOW_STATS))
+        if unknown:
+            raise ValueError(f"Unknown policy aggregate statistics: {sorted(unknown)}")
+        self.stats = list(stats)
+        self.windows = [int(window) for window in windows]
+        self.window_stats = list(window_stats)
+        self.key_col = key_col
+        self.value_col = value_col
+        self.date_col = date_col
+        self.events_ = pd.DataFrame({'key': pd.Series(dtype=object), 'date': pd.Series(dtype='datetime64[ns]'),
+                                     'value': pd.Series(dtype=float)})
+        self.history_ = None
+
+    @property
+    def columns(self):
+        columns = [PolicyAggregateStore.STATS[stat] for stat in self.stats]
+        for window in self.windows:
+            columns += [self._window_column(stat, window) for stat in self.window_stats]
+        return columns
+
+    def __len__(self):
+        return len(self.events_)
+
+    @staticmethod
+    def _window_column(stat, window):
+        return f"{PolicyAggregateStore.STATS[stat]}_{window}d"
+
+    def update(self, claims_df):
+        """Add a batch of claims to the history. Returns self."""
+        if self.key_col not in claims_df.columns:
+            return self
+
+        values = pd.to_numeric(claims_df[self.value_col], errors='coerce') if self.value_col in claims_df.columns \
+            else pd.Series(np.nan, index=claims_df.index)
+        dates = pd.to_datetime(claims_df[self.date_col], errors='coerce') if self.date_col in claims_df.columns \
+            else pd.Series(pd.NaT, index=claims_df.index)
+        batch = pd.DataFrame({'key': claims_df[self.key_col].to_numpy(dtype=object),
+                              'date': dates.to_numpy(dtype='datetime64[ns]'), 'value': values.to_numpy(dtype=float)})
+        # Claims without a policy or a date cannot be placed in anyone's history
+        batch = batch[batch['key'].notna() & batch['date'].notna()]
+        self.events_ = pd.concat([self.events_, batch], ignore_index=True) if len(self.events_) else batch
+
+        # Running statistics per policy in date order, then the whole history by date for merge_asof
+        history = self.events_.sort_values(['key', 'date'], kind='stable', ignore_index=True)
+        by_key = history.groupby('key', sort=False)
+        history['n_claims'] = by_key.cumcount() + 1
+        history['n_values'] = history['value'].notna().astype(np.int64).groupby(history['key'], sort=False).cumsum()
+        filled = history['value'].fillna(0.0)
+        history['sum'] = filled.groupby(history['key'], sort=False).cumsum()
+        history['sum_sq'] = (filled ** 2).groupby(history['key'], sort=False).cumsum()
+        history['max'] = history['value'].fillna(-np.inf).groupby(history['key'], sort=False).cummax()
+        self.history_ = history.drop(columns='value').rename(columns={'date': 'last_date'}) \
+            .sort_values('last_date', kind='stable', ignore_index=True)
+
+        logger.info(f"Point-in-time aggregates updated with {len(batch)} claims ({len(self)} in history)")
+        return self
+
+    def transform(self, df):
+        """Aggregate features for the rows of `df`, each as of its own claim date."""
+        dates = df[self.date_col] if self.date_col in df.columns else pd.Series(pd.NaT, index=df.index)
+        return self.lookup(df[self.key_col], dates)
+
+    def lookup(self, policy_ids, dates):
+        """
+        Aggregate features for claims of `policy_ids` dated `dates`, in order,
+        as a frame indexed like `policy_ids` (a Series) or by position.
+        """
+        index = policy_ids.index if isinstance(policy_ids, pd.Series) else None
+        n_rows = len(policy_ids)
+        query = pd.DataFrame({'key': np.asarray(policy_ids, dtype=object),
+                              'date': pd.to_datetime(pd.Series(np.asarray(dates)), errors='coerce')
+                                        .to_numpy(dtype='datetime64[ns]'),
+                              'row': np.arange(n_rows)})
+        query = query[query['key'].notna() & query['date'].notna()].sort_values('date', kind='stable')
+        rows = query['row'].to_numpy()
+
+        out = {PolicyAggregateStore.STATS[stat]: np.full(n_rows, PolicyAggregateStore.MISSING.get(stat, 0.0))
+               for stat in self.stats}
+        for window in self.windows:
+            out.update({self._window_column(stat, window): np.zeros(n_rows) for stat in self.window_stats})
+        if self.history_ is None or not len(query):
+            return pd.DataFrame(out, index=index)
+
+        now = self._as_of(query, query['date'])
+        lifetime = _moment_features(now['n_claims'], now['n_values'], now['sum'], now['sum_sq'])
+        lifetime['max'] = np.where(np.isfinite(now['max']), now['max'], 0.0)
+        days = (query['date'].to_numpy() - now['last_date']) / np.timedelta64(1, 'D')
+        lifetime['recency'] = np.where(np.isnan(days), PolicyAggregateStore.MISSING['recency'], days)
+        for stat in self.stats:
+            out[PolicyAggregateStore.STATS[stat]][rows] = lifetime[stat]
+
+        for window in self.windows:
+            start = self._as_of(query, query['date'] - pd.Timedelta(days=window))
+            in_window = _moment_features(*(now[col] - start[col] for col in ('n_claims', 'n_values', 'sum', 'sum_sq')))
+            for stat in self.window_stats:
+                out[self._window_column(stat, window)][rows] = in_window[stat]
+        return pd.DataFrame(out, index=index)
+
+    def _as_of(self, query, at):
+        """Running statistics of each query's policy over the claims strictly before `at`."""
+        matched = pd.merge_asof(pd.DataFrame({'key': query['key'].to_numpy(), 'at': at.to_numpy()}), self.history_,
+                                left_on='at', right_on='last_date', by='key',
+                                direction='backward', allow_exact_matches=False)
+        result = {col: matched[col].fillna(0).to_numpy(dtype=float) for col in ('n_claims', 'n_values', 'sum', 'sum_sq')}
+        result['max'] = matched['max'].fillna(-np.inf).to_numpy(dtype=float)
+        result['last_date'] = matched['last_date'].to_numpy(dtype='datetime64[ns]')
+        return result
+
 class AggregateFeatureEngineer:
     def __init__(self, config):
         self.config = config
-        
+        self.params = config.get('features', {}).get('aggregates', {})
+        self.stats = self.params.get('stats', ['count', 'mean'])
+
+    def create_policy_store(self, claims_df):
+        """
+        Aggregate store fitted on `claims_df`: PointInTimeAggregates with
+        `features.aggregates.point_in_time`, else a PolicyAggregateStore.
+        """
+        logger.info("Creating aggregate features by PolicyID...")
+        if self.params.get('point_in_time', False):
+            store = PointInTimeAggregates(self.stats, windows=self.params.get('windows', [30, 90, 365]),
+                                          window_stats=self.params.get('window_stats', ['count', 'mean']))
+        else:
+            store = PolicyAggregateStore(self.stats)
+        store.update(claims_df)
+        logger.info(f"Created {type(store).__name__} aggregate features from {len(claims_df)} claims")
+        return store
+
     def create_policy_aggregates(self, claims_df):
         """
         Create aggregate features based on PolicyID.
         """
         if 'PolicyID' not in claims_df.columns:
             return claims_df
-            
-        logger.info("Creating aggregate features by PolicyID...")
-        
-        # Count claims per policy
-        claim_counts = claims_df.groupby('PolicyID').size().reset_index(name='Policy_ClaimCount')
-        
-        # Average damage per policy (if multiple claims exist)
-        avg_damage = claims_df.groupby('PolicyID')['ReportedDamage'].mean().reset_index(name='Policy_AvgDamage')
-        
-        # Merge back
-        df_agg = pd.merge(claim_counts, avg_damage, on='PolicyID')
-        
-        logger.info(f"Created aggregate features for {len(df_agg)} policies")
-        return df_agg
+        return PolicyAggregateStore(self.stats).update(claims_df).frame()
+
+    def add_aggregates(self, df, store):
+        """
+        Add the store's features for each row, in place of a merge.
+        """
+        if store is None or store.key_col not in df.columns:
+            return df
+        features = store.transform(df)
+        return df.assign(**{column: values.to_numpy() for column, values in features.items()})
 
     def merge_aggregates(self, df, agg_df, on='PolicyID'):
         """
@@ -34,7 +310,7 @@ class AggregateFeatureEngineer:
         """
         if agg_df is None or agg_df.empty:
             return df
-            
+
         logger.info(f"Merging aggregate features into main dataframe...")
         df_merged = pd.merge(df, agg_df, on=on, how='left')
         return df_merged
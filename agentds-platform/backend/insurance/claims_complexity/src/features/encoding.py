@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import KFold
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class CategoricalEncoder:
+    """
+    Categorical encoder fitted once on the training frame.
+
+    Each column's category set is learned at fit time and frozen, so train
+    and scoring frames get exactly the same columns in the same order,
+    whatever categories a batch happens to contain:
+
+    - Columns with at most `max_categories` categories (seen at least
+      `min_frequency` times) are one-hot encoded: one `<col>_<category>`
+      indicator per category, in sorted order, plus `<col>_other` for rarer,
+      unseen and missing values.
+    - Wider columns get one bounded-width encoding (`high_cardinality`):
+      'ordinal' (`<col>_ordinal`, categories ranked by training frequency,
+      0 for unseen) or 'target' (`<col>_te_<class>`, the smoothed share of
+      each target class among the category's training rows, the overall
+      share for unseen ones). fit_transform gives training rows
+      out-of-fold target encodings, so a row never sees its own label.
+
+    Encodings are vectorized (category codes, then one sparse matrix built
+    from (row, column) pairs); `transform` returns a frame (uint8
+    indicators, float32 encodings) or, with `sparse=True`, a CSR block with
+    its feature names for hstack_features.
+    """
+    HIGH_CARDINALITY = ('ordinal', 'target')
+
+    def __init__(self, columns=None, max_categories=20, min_frequency=1, high_cardinality='target',
+                 smoothing=10.0, n_folds=5, random_state=42):
+        if high_cardinality not in self.HIGH_CARDINALITY:
+            raise ValueError(f"Unknown high-cardinality encoding '{high_cardinality}'; "
+                             f"expected one of {self.HIGH_CARDINALITY}")
+        self.columns = columns
+        self.max_categories = max_categories
+        self.min_frequency = min_frequency
+        self.high_cardinality = high_cardinality
+        self.smoothing = smoothing
+        self.n_folds = n_folds
+        self.random_state = random_state
+
+    def fit(self, df, y=None):
+        self._fit(df, y)
+        return self
+
+    def fit_transform(self, df, y=None, sparse=False):
+        """Fit, then encode `df`, with out-of-fold target encodings for its rows."""
+        y_codes = self._fit(df, y)
+        return self._encode(df, sparse, y_codes=y_codes)
+
+    def transform(self, df, sparse=False):
+        if not hasattr(self, 'feature_names_'):
+            raise RuntimeError("CategoricalEncoder must be fitted before transform.")
+        return self._encode(df, sparse)
+
+    def _fit(self, df, y):
+        self.columns_ = list(self.columns) if self.columns is not None else []
+        self.onehot_ = {}     # column -> categories with an indicator each
+        self.ordinal_ = {}    # column -> categories by training frequency (rank = position + 1)
+        self.target_ = {}     # column -> (categories, per-category class shares)
+        y_codes = None
+        if y is not None:
+            self.classes_, y_codes = np.unique(np.asarray(y), return_inverse=True)
+            self.prior_ = np.bincount(y_codes, minlength=len(self.classes_)) / len(y_codes)
+
+        for col in self.columns_:
+            counts = df[col].value_counts(dropna=True)
+            counts = counts[counts >= self.min_frequency]
+            if len(counts) <= self.max_categories:
+                self.onehot_[col] = np.array(sorted(counts.index, key=str), dtype=object)
+            elif self.high_cardinality == 'target' and y_codes is not None:
+                categories = counts.index.to_numpy(dtype=object)
+                self.target_[col] = (categories, self._class_shares(self._codes(df[col], categories), y_codes,
+                                                                    len(categories)))
+            else:
+                if self.high_cardinality == 'target':
+                    logger.warning(f"No target given: encoding high-cardinality column {col} as ordinal")
+                self.ordinal_[col] = counts.index.to_numpy(dtype=object)
+
+        self.feature_names_ = []
+        for col in self.columns_:
+            if col in self.onehot_:
+                self.feature_names_ += [f"{col}_{category}" for category in self.onehot_[col]] + [f"{col}_other"]
+            elif col in self.target_:
+                self.feature_names_ += [f"{col}_te_{cls}" for cls in self.classes_]
+            else:
+                self.feature_names_.append(f"{col}_ordinal")
+        logger.info(f"Categorical encoder fitted: {len(self.onehot_)} one-hot, {len(self.target_)} target, "
+                    f"{len(self.ordinal_)} ordinal columns -> {len(self.feature_names_)} features")
+        return y_codes
+
+    @staticmethod
+    def _codes(values, categories):
+        """Position of each value in `categories`, -1 for unseen or missing."""
+        return pd.Categorical(values, categories=categories).codes.astype(np.int64)
+
+    def _class_shares(self, codes, y_codes, n_categories):
+        n_classes = len(self.classes_)
+        seen = codes >= 0
+        counts = np.bincount(codes[seen] * n_classes + y_codes[seen],
+                             minlength=n_categories * n_classes).reshape(n_categories, n_classes)
+        # Shrink each category's class shares towards the overall shares
+        return (counts + self.smoothing * self.prior_) / (counts.sum(axis=1, keepdims=True) + self.smoothing)
+
+    def _encode(self, df, as_sparse, y_codes=None):
+        n_rows = len(df)
+        rows, cols, values = [], [], []
+        offset = 0
+        for col in self.columns_:
+            # Columns absent from the frame (e.g. claims scored without policies) are all missing
+            column = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            if col in self.onehot_:
+                categories = self.onehot_[col]
+                codes = self._codes(column, categories)
+                codes[codes < 0] = len(categories)  # the "other" slot
+                rows.append(np.arange(n_rows))
+                cols.append(offset + codes)
+                values.append(np.ones(n_rows, dtype=np.float32))
+                offset += len(categories) + 1
+            elif col in self.target_:
+                shares = self._target_encode(col, column, y_codes)
+                n_classes = shares.shape[1]
+                rows.append(np.repeat(np.arange(n_rows), n_classes))
+                cols.append(np.tile(offset + np.arange(n_classes), n_rows))
+                values.append(shares.astype(np.float32).ravel())
+                offset += n_classes
+            else:
+                rows.append(np.arange(n_rows))
+                cols.append(np.full(n_rows, offset))
+                values.append((self._codes(column, self.ordinal_[col]) + 1).astype(np.float32))
+                offset += 1
+
+        if rows:
+            block = sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                      shape=(n_rows, offset), dtype=np.float32)
+            block.eliminate_zeros()
+        else:
+            block = sparse.csr_matrix((n_rows, 0), dtype=np.float32)
+        if as_sparse:
+            return block, list(self.feature_names_)
+
+        encoded = pd.DataFrame(block.toarray(), columns=self.feature_names_, index=df.index)
+        indicators = [name for col in self.onehot_
+                      for name in [f"{col}_{category}" for category in self.onehot_[col]] + [f"{col}_other"]]
+        return encoded.astype({name: np.uint8 for name in indicators})
+
+    def _target_encode(self, col, values, y_codes):
+        categories, shares = self.target_[col]
+        codes = self._codes(values, categories)
+        if y_codes is None:
+            return np.where((codes >= 0)[:, None], shares[np.maximum(codes, 0)], self.prior_)
+
+        # Training rows: shares from the other folds only
+        encoded = np.empty((len(codes), len(self.classes_)))
+        folds = KFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_state)
+        for fit_idx, enc_idx in folds.split(codes):
+            fold_shares = self._class_shares(codes[fit_idx], y_codes[fit_idx], len(categories))
+            fold_codes = codes[enc_idx]
+            encoded[enc_idx] = np.where((fold_codes >= 0)[:, None], fold_shares[np.maximum(fold_codes, 0)],
+                                        self.prior_)
+        return encoded
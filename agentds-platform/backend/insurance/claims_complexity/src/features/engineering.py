@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
-from src.utils.logger import setup_logger
+from .encoding import CategoricalEncoder
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -50,20 +51,25 @@ class FeatureEngineer:
             
         return df
 
-    def encode_categorical_features(self, df, cat_cols=None):
+    def categorical_columns(self, df, exclude=None):
         """
-        One-hot encode categorical features.
+        Text and categorical columns of `df`, without the target, IDs and `exclude`.
         """
-        df = df.copy()
-        if cat_cols is None:
-            cat_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
-            # Exclude target and IDs if they are in cat_cols
-            exclude = [self.config['data']['target_col'], self.config['data']['id_col'], self.config['data']['join_col']]
-            cat_cols = [c for c in cat_cols if c not in exclude]
-            
-        if not cat_cols:
-            return df
-            
-        logger.info(f"One-hot encoding columns: {cat_cols}")
-        df = pd.get_dummies(df, columns=cat_cols, drop_first=True)
-        return df
+        exclude = [self.config['data']['target_col'], self.config['data']['id_col'], self.config['data']['join_col']] + list(exclude or [])
+        cat_cols = df.select_dtypes(include=['object', 'string', 'category']).columns
+        return [c for c in cat_cols if c not in exclude]
+
+    def create_categorical_encoder(self, cat_cols):
+        """
+        CategoricalEncoder over `cat_cols`, configured from features.categorical.
+        """
+        cfg = self.config['features'].get('categorical') or {}
+        return CategoricalEncoder(
+            columns=cat_cols,
+            max_categories=cfg.get('max_categories', 20),
+            min_frequency=cfg.get('min_frequency', 1),
+            high_cardinality=cfg.get('high_cardinality', 'target'),
+            smoothing=cfg.get('smoothing', 10.0),
+            n_folds=cfg.get('n_folds', 5),
+            random_state=self.config.get('random_seed', 42)
+        )
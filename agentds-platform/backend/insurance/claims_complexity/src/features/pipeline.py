@@ -0,0 +1,224 @@
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+try:
+    import joblib
+except ImportError:
+    from sklearn.externals import joblib
+from ..preprocessing.merging import DataMerger
+from ..preprocessing.cleaning import DataCleaner
+from .engineering import FeatureEngineer
+from .text_features import TextFeatureEngineer
+from .aggregation import AggregateFeatureEngineer
+from .sparse import hstack_features
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class ClaimsFeaturePipeline:
+    """
+    Fitted end-to-end feature pipeline for claims complexity:
+    merge -> clean -> temporal/interaction -> text -> TF-IDF -> aggregates -> encode -> align.
+
+    Everything learned on the training set (imputation values, TF-IDF vocabulary,
+    policy aggregates, category sets, final column layout, target classes) lives on the instance,
+    so the same object is saved next to the model and reused for batch scoring.
+    The policy aggregates are an incremental store: `update_aggregates` folds
+    newly arrived claims into it without refitting anything else.
+    """
+    TEXT_COL = 'Description'
+    DATE_COL = 'ClaimDate'
+    # Free text and raw dates are dropped from X, never one-hot encoded
+    NON_CATEGORICAL = ['ClaimDate', 'Description', 'PolicyStart', 'PolicyEnd']
+    RAW_CATEGORICAL = ['ClaimType', 'VehicleType']
+    # Fitted attributes per stage, for running stages separately (see main.py)
+    PREPROCESS_STATE = ['fill_values_', 'sample_record_']
+    TEXT_STATE = ['vectorizer_', 'tfidf_names_']
+
+    def __init__(self, config):
+        self.config = config
+        self.sparse = config['features']['tfidf'].get('sparse', False)
+        self.target_col = config['data']['target_col']
+        self.id_col = config['data']['id_col']
+        self.join_col = config['data']['join_col']
+
+        self.merger = DataMerger(config)
+        self.cleaner = DataCleaner(config)
+        self.fe = FeatureEngineer(config)
+        self.tfe = TextFeatureEngineer(config)
+        self.afe = AggregateFeatureEngineer(config)
+
+        # Fitted state
+        self.fill_values_ = None
+        self.vectorizer_ = None
+        self.tfidf_names_ = []
+        self.agg_store_ = None
+        self.cat_encoder_ = None
+        self.numeric_columns_ = None
+        self.feature_names_ = None
+        self.label_encoder_ = None
+        self.sample_record_ = None
+
+    @property
+    def is_fitted(self):
+        return self.numeric_columns_ is not None
+
+    def fit(self, claims_df, policies_df=None):
+        self.fit_transform(claims_df, policies_df)
+        return self
+
+    def fit_transform(self, claims_df, policies_df=None):
+        """
+        Learn all pipeline state from the training claims and return X.
+        """
+        logger.info("Fitting claims feature pipeline...")
+        df = self.fit_preprocess(claims_df, policies_df)
+        tfidf = self.fit_text(df)
+        self.fit_aggregates(claims_df)
+        return self.fit_encode(df, tfidf)
+
+    def fit_preprocess(self, claims_df, policies_df=None):
+        """
+        Merge, learn imputation values, then clean and add temporal,
+        interaction and basic text features. Returns the processed frame.
+        """
+        df = self.merger.merge_claims_policies(claims_df, policies_df)
+        self.fill_values_ = self.cleaner.fit_missing_values(df)
+        # One merged raw row (policy fields inlined) for warm-up predictions
+        self.sample_record_ = df.head(1).drop(columns=[self.target_col], errors='ignore').to_dict(orient='records')
+        return self._tabular(df)
+
+    def fit_text(self, df):
+        """
+        Fit TF-IDF on the processed frame. Returns the TF-IDF block: a CSR
+        matrix in sparse mode, otherwise a frame of the tfidf_* columns.
+        """
+        if self.sparse:
+            tfidf, self.tfidf_names_, self.vectorizer_ = self.tfe.fit_transform_tfidf_sparse(df, self.TEXT_COL)
+            return tfidf
+        with_tfidf, self.vectorizer_ = self.tfe.fit_transform_tfidf(df, self.TEXT_COL)
+        return with_tfidf[with_tfidf.columns.difference(df.columns, sort=False)]
+
+    def fit_aggregates(self, claims_df):
+        """
+        Policy aggregates from the original training claims (historical source).
+        """
+        self.agg_store_ = self.afe.create_policy_store(claims_df)
+        return self.agg_store_
+
+    def update_aggregates(self, claims_df):
+        """
+        Add a new batch of claims to the policy history; later transforms see
+        the updated aggregates.
+        """
+        if self.agg_store_ is None:
+            raise RuntimeError("Policy aggregates must be fitted before they can be updated.")
+        self.agg_store_.update(claims_df)
+        return self.agg_store_
+
+    def fit_encode(self, df, tfidf):
+        """
+        Final stage: merge aggregates, encode and fix the column layout. Returns X.
+        """
+        if not self.sparse and tfidf is not None:
+            df = pd.concat([df, tfidf], axis=1)
+        numeric, categorical = self._encode_and_select(df, fit=True)
+        self.numeric_columns_ = numeric.columns.tolist()
+        X, self.feature_names_ = self._assemble(numeric, tfidf if self.sparse else None, categorical)
+
+        logger.info(f"Pipeline fitted: {len(self.feature_names_)} features")
+        return X
+
+    def get_state(self, names):
+        return {name: getattr(self, name) for name in names}
+
+    def set_state(self, state):
+        """Restore fitted attributes, e.g. when a stage's output comes from the feature store."""
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def transform(self, claims_df, policies_df=None):
+        """
+        Apply the fitted pipeline to new claims in one vectorized pass.
+        """
+        if not self.is_fitted:
+            raise RuntimeError("ClaimsFeaturePipeline must be fitted before transform.")
+
+        df = self.merger.merge_claims_policies(claims_df, policies_df)
+        df = self._tabular(df)
+
+        tfidf = None
+        if self.sparse:
+            tfidf, _ = self.tfe.transform_tfidf_sparse(df, self.TEXT_COL, vectorizer=self.vectorizer_)
+        elif self.vectorizer_ is not None:
+            df = self.tfe.transform_tfidf(df, self.TEXT_COL, vectorizer=self.vectorizer_)
+
+        # Align to the training layout, e.g. policy columns are absent when claims come without policies
+        numeric, categorical = self._encode_and_select(df)
+        numeric = numeric.reindex(columns=self.numeric_columns_, fill_value=0)
+        X, _ = self._assemble(numeric, tfidf, categorical)
+        return X
+
+    def encode_target(self, y):
+        """
+        Fit the target label encoder on training labels and return integer codes.
+        """
+        self.label_encoder_ = LabelEncoder()
+        return self.label_encoder_.fit_transform(y)
+
+    @property
+    def classes_(self):
+        return self.label_encoder_.classes_ if self.label_encoder_ is not None else None
+
+    def decode_target(self, codes):
+        return self.label_encoder_.inverse_transform(np.asarray(codes))
+
+    def _tabular(self, df):
+        df = self.cleaner.handle_missing_values(df, fill_values=self.fill_values_)
+        df = self.fe.create_temporal_features(df, self.DATE_COL)
+        df = self.fe.create_interaction_features(df)
+        df = self.tfe.extract_basic_text_features(df, self.TEXT_COL)
+        return df
+
+    def _encode_and_select(self, df, fit=False):
+        """
+        Returns the numeric frame and the encoded categorical block. In dense
+        mode the encoded columns are part of the frame and the block is None;
+        in sparse mode the block is a (CSR, names) pair for hstack_features.
+        """
+        df = self.afe.add_aggregates(df, self.agg_store_)
+
+        if fit:
+            cat_cols = self.fe.categorical_columns(df, exclude=self.NON_CATEGORICAL)
+            self.cat_encoder_ = self.fe.create_categorical_encoder(cat_cols)
+            y = df[self.target_col] if self.target_col in df.columns else None
+            categorical = self.cat_encoder_.fit_transform(df, y, sparse=self.sparse)
+        else:
+            categorical = self.cat_encoder_.transform(df, sparse=self.sparse)
+
+        drop_cols = ([self.target_col, self.id_col, self.join_col] + self.NON_CATEGORICAL + self.RAW_CATEGORICAL
+                     + self.cat_encoder_.columns_)
+        X = df.drop(columns=[c for c in drop_cols if c in df.columns])
+        X = X.select_dtypes(include=[np.number, 'bool'])
+        if not self.sparse:
+            return pd.concat([X, categorical], axis=1), None
+        return X, categorical
+
+    def _assemble(self, numeric, tfidf, categorical=None):
+        if self.sparse:
+            return hstack_features(numeric, categorical, (tfidf, self.tfidf_names_))
+        return numeric, numeric.columns.tolist()
+
+    def save(self, name="feature_pipeline.joblib"):
+        path = os.path.join(self.config['paths']['models'], name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+        logger.info(f"Feature pipeline saved to {path}")
+        return path
+
+    @staticmethod
+    def load(path):
+        pipeline = joblib.load(path)
+        logger.info(f"Feature pipeline loaded from {path}")
+        return pipeline
@@ -0,0 +1,42 @@
+import numpy as np
+from scipy import sparse
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+def hstack_features(numeric_df, *blocks, dtype=np.float32):
+    """
+    Horizontally stack a numeric DataFrame with sparse feature blocks.
+
+    Each block is a (matrix, feature_names) pair, e.g. the output of
+    TextFeatureEngineer.transform_tfidf_sparse. Returns (csr_matrix, feature_names).
+    """
+    numeric = numeric_df.select_dtypes(include=[np.number, 'bool'])
+    feature_names = numeric.columns.tolist()
+    parts = [sparse.csr_matrix(numeric.to_numpy(dtype=dtype, na_value=np.nan))]
+
+    for matrix, names in blocks:
+        if matrix is None:
+            continue
+        if matrix.shape[0] != len(numeric):
+            raise ValueError(f"Row mismatch: numeric block has {len(numeric)} rows, sparse block has {matrix.shape[0]}")
+        parts.append(sparse.csr_matrix(matrix, dtype=dtype))
+        feature_names.extend(names)
+
+    X = sparse.hstack(parts, format='csr', dtype=dtype)
+    logger.info(f"Stacked sparse feature matrix: shape={X.shape}, nnz={X.nnz}, "
+                f"size={sparse_nbytes(X) / 1024**2:.2f} MB")
+    return X, feature_names
+
+def sparse_nbytes(X):
+    """
+    Memory held by a CSR/CSC matrix (data + indices + indptr).
+    """
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+def take_rows(X, idx):
+    """
+    Rows `idx` of a feature matrix: a DataFrame, or a CSR matrix / ndarray
+    when the TF-IDF block is kept sparse.
+    """
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
@@ -1,7 +1,15 @@
+import multiprocessing as mp
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from src.utils.logger import setup_logger
+import pyarrow as pa
+import pyarrow.compute as pc
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+from ..utils.logger import setup_logger
 try:
     import joblib
 except ImportError:
@@ -9,29 +17,226 @@ except ImportError:
 
 logger = setup_logger(__name__)
 
+class TextStatistics:
+    """
+    Vectorized statistics of a free-text column.
+
+    The column is taken as one Arrow UTF-8 buffer. Each character class
+    (space / digit / upper case / punctuation) is one vectorized range test
+    over all of its bytes, and the matching positions are split into rows
+    with one searchsorted against the Arrow offsets; words are counted as
+    non-space bytes that follow a space or start a row. No Python code runs
+    per row. Statistics (config `stats`): length (characters), word_count,
+    avg_word_length, digit_ratio, upper_ratio and punctuation_ratio (ASCII
+    classes; space and control characters separate words, other characters
+    count as letters). Each keyword group of `lexicon` adds a 0/1 `Has_<group>`
+    flag: a whole-word, case-insensitive match of any of its keywords, one
+    Arrow regex kernel per group.
+
+    Columns longer than `chunk_size` rows are split into chunks processed by
+    `n_jobs` threads (NumPy and Arrow kernels release the GIL).
+    """
+    STATS = {
+        'length': 'Length',
+        'word_count': 'WordCount',
+        'avg_word_length': 'AvgWordLength',
+        'digit_ratio': 'DigitRatio',
+        'upper_ratio': 'UpperRatio',
+        'punctuation_ratio': 'PunctuationRatio',
+    }
+
+    def __init__(self, stats=('length', 'word_count'), lexicon=None, n_jobs=1, chunk_size=250000):
+        unknown = set(stats) - set(self.STATS)
+        if unknown:
+            raise ValueError(f"Unknown text statistics: {sorted(unknown)}")
+        self.stats = list(stats)
+        self.lexicon = dict(lexicon or {})
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.patterns = {group: r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\b'
+                         for group, words in self.lexicon.items() if words}
+
+    def transform(self, text):
+        """Statistics of a text Series (missing values count as empty), as a frame with the same index."""
+        n_jobs = self.n_jobs if self.n_jobs and self.n_jobs > 0 else (os.cpu_count() or 1)
+        if n_jobs == 1 or len(text) <= self.chunk_size:
+            return self._statistics(text)
+
+        chunks = [text.iloc[start:start + self.chunk_size] for start in range(0, len(text), self.chunk_size)]
+        with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix='text-stats') as pool:
+            return pd.concat(list(pool.map(self._statistics, chunks)))
+
+    def _statistics(self, text):
+        array = pa.array(text.astype('string[pyarrow]'), from_pandas=True)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        array = pc.fill_null(array.cast(pa.large_string()), '')
+        _, offsets_buffer, data_buffer = array.buffers()
+        offsets = np.frombuffer(offsets_buffer, dtype=np.int64)[array.offset:array.offset + len(array) + 1]
+        data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]] if data_buffer is not None \
+            else np.zeros(0, dtype=np.uint8)
+        bounds = offsets - offsets[0]
+
+        def per_row(mask):
+            return np.diff(np.searchsorted(np.flatnonzero(mask), bounds)).astype(float)
+
+        # Space and the ASCII control characters (tab, newline, ...) separate words;
+        # uint8 arithmetic wraps, so `data - lo <= hi - lo` tests lo <= data <= hi
+        space = data <= 32
+        length = pc.utf8_length(array).to_numpy(zero_copy_only=False).astype(float)
+        counts = {}
+        if {'word_count', 'avg_word_length'} & set(self.stats):
+            after_space = np.ones_like(space)
+            after_space[1:] = space[:-1]
+            after_space[bounds[:-1][bounds[:-1] < len(data)]] = True
+            counts['words'] = per_row(~space & after_space)
+            counts['spaces'] = per_row(space)
+        if 'digit_ratio' in self.stats:
+            counts['digit_ratio'] = per_row(data - 48 <= 9)
+        if 'upper_ratio' in self.stats:
+            counts['upper_ratio'] = per_row(data - 65 <= 25)
+        if 'punctuation_ratio' in self.stats:
+            # string.punctuation except '_', which \w counts as a word character
+            counts['punctuation_ratio'] = per_row((data - 33 <= 14) | (data - 58 <= 6) | (data - 91 <= 3)
+                                                  | (data == 96) | (data - 123 <= 3))
+
+        out = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for stat in self.stats:
+                if stat == 'length':
+                    value = length
+                elif stat == 'word_count':
+                    value = counts['words']
+                elif stat == 'avg_word_length':
+                    value = (length - counts['spaces']) / counts['words']
+                else:
+                    value = counts[stat] / length
+                # Empty texts have no ratios
+                out[self.STATS[stat]] = np.nan_to_num(value)
+        for group, pattern in self.patterns.items():
+            out[f'Has_{group}'] = pc.match_substring_regex(array, pattern, ignore_case=True) \
+                .to_numpy(zero_copy_only=False).astype(np.int8)
+        return pd.DataFrame(out, index=text.index)
+
+class HashingTfidfVectorizer:
+    """
+    Stateless TF-IDF: n-grams are hashed into `n_features` buckets
+    (sklearn HashingVectorizer) instead of being looked up in a fitted
+    vocabulary, so no vocabulary is ever built or held in memory. The only
+    state is the document frequency of each bucket and the document count,
+    from which the IDF is derived (smoothed like TfidfVectorizer).
+
+    `partial_fit` adds a batch of documents to those counts, so the IDF is
+    estimated online from a stream of chunks (e.g. pd.read_csv(chunksize=...))
+    and updated when new claims arrive, without a refit. `fit` and
+    `transform` split their input into `chunk_size` documents and, with
+    `n_jobs` > 1, hash the chunks in that many processes.
+    """
+    def __init__(self, n_features=1024, ngram_range=(1, 2), stop_words='english', chunk_size=50000, n_jobs=1):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = stop_words
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+        self.n_docs_ = 0
+        self.doc_freq_ = np.zeros(n_features, dtype=np.int64)
+
+    def _hasher(self):
+        return HashingVectorizer(n_features=self.n_features, ngram_range=self.ngram_range, stop_words=self.stop_words,
+                                 alternate_sign=False, norm=None, dtype=np.float32)
+
+    def partial_fit(self, texts):
+        """Add documents to the document-frequency counts. Returns self."""
+        for n_docs, doc_freq in self._map_chunks(_chunk_doc_freq, texts):
+            self.n_docs_ += n_docs
+            self.doc_freq_ += doc_freq
+        return self
+
+    def fit(self, texts):
+        self.n_docs_ = 0
+        self.doc_freq_ = np.zeros(self.n_features, dtype=np.int64)
+        return self.partial_fit(texts)
+
+    def fit_transform(self, texts):
+        # Hash once: the document frequencies come from the same counts
+        counts = self._counts(texts)
+        self.n_docs_ = counts.shape[0]
+        self.doc_freq_ = np.bincount(counts.indices, minlength=self.n_features).astype(np.int64)
+        return self._tfidf(counts)
+
+    @property
+    def idf_(self):
+        return (np.log((1 + self.n_docs_) / (1 + self.doc_freq_)) + 1).astype(np.float32)
+
+    def transform(self, texts):
+        """L2-normalized TF-IDF rows as a float32 CSR matrix."""
+        return self._tfidf(self._counts(texts))
+
+    def _counts(self, texts):
+        counts = list(self._map_chunks(_chunk_counts, texts))
+        return sp.vstack(counts, format='csr') if counts else sp.csr_matrix((0, self.n_features), dtype=np.float32)
+
+    def _tfidf(self, counts):
+        return normalize(counts @ sp.diags(self.idf_), copy=False).astype(np.float32).tocsr()
+
+    def get_feature_names_out(self):
+        return np.array([f"hash_{i}" for i in range(self.n_features)], dtype=object)
+
+    def _map_chunks(self, fn, texts):
+        texts = pd.Series(texts).fillna('').astype(str)
+        chunks = [texts.iloc[start:start + self.chunk_size].tolist()
+                  for start in range(0, len(texts), self.chunk_size)]
+        if self.n_jobs == 1 or len(chunks) <= 1:
+            hasher = self._hasher()
+            return [fn(hasher, chunk) for chunk in chunks]
+
+        n_jobs = self.n_jobs if self.n_jobs > 0 else (os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), mp_context=mp.get_context('spawn')) as pool:
+            # map keeps the chunk order, so transformed rows line up with the input
+            return list(pool.map(fn, [self._hasher()] * len(chunks), chunks))
+
+def _chunk_doc_freq(hasher, chunk):
+    counts = hasher.transform(chunk)
+    return len(chunk), np.bincount(counts.indices, minlength=hasher.n_features)
+
+def _chunk_counts(hasher, chunk):
+    return hasher.transform(chunk).tocsr()
+
 class TextFeatureEngineer:
     def __init__(self, config):
         self.config = config
         self.tfidf_params = config['features']['tfidf']
-        self.vectorizer = TfidfVectorizer(
-            max_features=self.tfidf_params['max_features'],
-            ngram_range=tuple(self.tfidf_params['ngram_range']),
-            stop_words='english'
-        )
+        if self.tfidf_params.get('mode', 'vocabulary') == 'hashing':
+            self.vectorizer = HashingTfidfVectorizer(
+                n_features=self.tfidf_params.get('n_features', 1024),
+                ngram_range=self.tfidf_params['ngram_range'],
+                chunk_size=self.tfidf_params.get('chunk_size', 50000),
+                n_jobs=self.tfidf_params.get('n_jobs', 1)
+            )
+        else:
+            self.vectorizer = TfidfVectorizer(
+                max_features=self.tfidf_params['max_features'],
+                ngram_range=tuple(self.tfidf_params['ngram_range']),
+                stop_words='english'
+            )
         self.text_col = 'Description' # Should be configurable, but defaulting to known col
-        
+        stats_params = config['features'].get('text_stats', {})
+        self.text_stats = TextStatistics(stats=stats_params.get('stats', ['length', 'word_count']),
+                                         lexicon=stats_params.get('lexicon'),
+                                         n_jobs=stats_params.get('n_jobs', 1),
+                                         chunk_size=stats_params.get('chunk_size', 250000))
+
     def extract_basic_text_features(self, df, text_col):
         """
-        Extract length, word count, etc.
+        Extract length, word count, etc. (see TextStatistics).
         """
         if text_col not in df.columns:
             return df
-            
-        df = df.copy()
-        df[f'{text_col}_Length'] = df[text_col].astype(str).str.len()
-        df[f'{text_col}_WordCount'] = df[text_col].astype(str).apply(lambda x: len(x.split()))
-        
-        logger.info(f"Created basic text features for {text_col}")
+
+        stats = self.text_stats.transform(df[text_col])
+        df = df.assign(**{f'{text_col}_{name}': values.to_numpy() for name, values in stats.items()})
+
+        logger.info(f"Created {stats.shape[1]} basic text features for {text_col}")
         return df
 
     def fit_transform_tfidf(self, df, text_col):
@@ -75,3 +280,39 @@ class TextFeatureEngineer:
         
         df_new = pd.concat([df, tfidf_df], axis=1)
         return df_new
+
+    def fit_transform_tfidf_sparse(self, df, text_col):
+        """
+        Fit TF-IDF and keep the output as a CSR matrix.
+        Returns (matrix, feature_names, vectorizer) and leaves df untouched.
+        """
+        if text_col not in df.columns:
+            logger.warning(f"Text column {text_col} not found for TF-IDF.")
+            return None, [], None
+
+        logger.info(f"Fitting sparse TF-IDF on {text_col}...")
+        text_data = df[text_col].astype(str).fillna('')
+        tfidf_matrix = self.vectorizer.fit_transform(text_data).astype(np.float32).tocsr()
+
+        feature_names = [f"tfidf_{name}" for name in self.vectorizer.get_feature_names_out()]
+        logger.info(f"Created {len(feature_names)} sparse TF-IDF features "
+                    f"({tfidf_matrix.nnz} non-zeros, density {tfidf_matrix.nnz / max(np.prod(tfidf_matrix.shape), 1):.4f})")
+
+        return tfidf_matrix, feature_names, self.vectorizer
+
+    def transform_tfidf_sparse(self, df, text_col, vectorizer=None):
+        """
+        Transform using existing vectorizer, keeping the CSR matrix.
+        Returns (matrix, feature_names).
+        """
+        if vectorizer is None:
+            vectorizer = self.vectorizer
+
+        if text_col not in df.columns:
+            return None, []
+
+        text_data = df[text_col].astype(str).fillna('')
+        tfidf_matrix = vectorizer.transform(text_data).astype(np.float32).tocsr()
+
+        feature_names = [f"tfidf_{name}" for name in vectorizer.get_feature_names_out()]
+        return tfidf_matrix, feature_names
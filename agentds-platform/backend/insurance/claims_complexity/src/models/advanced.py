@@ -1,20 +1,39 @@
 from xgboost import XGBClassifier
 from lightgbm import LGBMClassifier
+import lightgbm as lgb
+import numpy as np
 from sklearn.metrics import f1_score, classification_report
+from sklearn.model_selection import train_test_split
+import json
 import os
+import time
 try:
     import joblib
 except ImportError:
     from sklearn.externals import joblib
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 class AdvancedModel:
+    """
+    XGBoost / LightGBM classifier. With `early_stopping_rounds` set, train
+    holds out a stratified `early_stopping_fraction` of the training rows and
+    boosting stops once multi-class log loss on that slice has not improved
+    for `early_stopping_rounds` rounds; predictions only use the trees up to
+    the best iteration (`n_trees_used_`). The validation set passed to train
+    is never used for stopping, so metrics reported on it stay unbiased.
+    """
     def __init__(self, config, model_type='xgboost'):
         self.config = config
         self.model_type = model_type
         self.model_params = config['model']['advanced'].get(model_type, {})
+        self.early_stopping_rounds = self.model_params.get('early_stopping_rounds')
+        self.early_stopping_fraction = self.model_params.get('early_stopping_fraction', 0.1)
+        self.best_iteration_ = None
+        self.best_score_ = None
+        self.n_trees_used_ = None
+        self.n_trees_trained_ = None
         
         if model_type == 'xgboost':
             self.model = XGBClassifier(
@@ -38,21 +57,56 @@ class AdvancedModel:
             
     def train(self, X_train, y_train, X_val=None, y_val=None):
         logger.info(f"Training {self.model_type} with params: {self.model_params}")
-        
-        # XGBoost and LightGBM support early stopping if eval_set is provided
-        fit_params = {}
-        if X_val is not None and y_val is not None:
-             # Scikit-learn API changes for early stopping in recent versions
-             # For simplicity, we'll just fit normally for now, or add eval_set if needed
-             # self.model.fit(X_train, y_train, eval_set=[(X_val, y_val)], early_stopping_rounds=10)
-             pass
-        
-        self.model.fit(X_train, y_train)
-        logger.info("Model training complete.")
-        
+        start = time.perf_counter()
+
+        early_stopping = bool(self.early_stopping_rounds)
+        if not early_stopping:
+            self.model.fit(X_train, y_train)
+        else:
+            # Stop on a slice of the training rows; X_val is left for evaluation
+            _, class_counts = np.unique(y_train, return_counts=True)
+            X_fit, X_stop, y_fit, y_stop = train_test_split(
+                X_train, y_train, test_size=self.early_stopping_fraction, random_state=self.config['random_seed'],
+                stratify=y_train if class_counts.min() >= 2 else None)
+            if self.model_type == 'xgboost':
+                self.model.set_params(early_stopping_rounds=self.early_stopping_rounds, eval_metric='mlogloss')
+                self.model.fit(X_fit, y_fit, eval_set=[(X_stop, y_stop)], verbose=False)
+            else:
+                self.model.fit(X_fit, y_fit, eval_set=[(X_stop, y_stop)], eval_metric='multi_logloss',
+                               callbacks=[lgb.early_stopping(self.early_stopping_rounds, verbose=False)])
+
+        self._record_iterations(early_stopping)
+        logger.info(f"Model training complete in {time.perf_counter() - start:.2f}s: "
+                    f"{self.n_trees_used_} of {self.n_trees_trained_} boosting rounds used"
+                    + (f" (best early-stopping mlogloss {self.best_score_:.4f})" if self.best_score_ is not None else ""))
+
+    def _record_iterations(self, early_stopping):
+        if self.model_type == 'xgboost':
+            self.n_trees_trained_ = self.model.get_booster().num_boosted_rounds()
+            if early_stopping:
+                self.best_iteration_ = int(self.model.best_iteration)
+                self.best_score_ = float(self.model.best_score)
+        else:
+            self.n_trees_trained_ = self.model.booster_.current_iteration()
+            # LightGBM reports best_iteration_ 1-based, 0 when it did not stop early
+            if early_stopping and self.model.best_iteration_:
+                self.best_iteration_ = int(self.model.best_iteration_) - 1
+                self.best_score_ = float(self.model.best_score_['valid_0']['multi_logloss'])
+        self.n_trees_used_ = self.best_iteration_ + 1 if self.best_iteration_ is not None else self.n_trees_trained_
+
+    def _iteration_kwargs(self):
+        if self.n_trees_used_ is None:
+            return {}
+        if self.model_type == 'xgboost':
+            return {'iteration_range': (0, self.n_trees_used_)}
+        return {'num_iteration': self.n_trees_used_}
+
     def predict(self, X):
-        return self.model.predict(X)
-        
+        return self.model.predict(X, **self._iteration_kwargs())
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X, **self._iteration_kwargs())
+
     def evaluate(self, X_test, y_test):
         y_pred = self.predict(X_test)
         macro_f1 = f1_score(y_test, y_pred, average='macro')
@@ -71,5 +125,21 @@ class AdvancedModel:
         path = os.path.join(self.config['paths']['models'], name)
         os.makedirs(os.path.dirname(path), exist_ok=True)
         joblib.dump(self.model, path)
-        logger.info(f"Model saved to {path}")
+
+        # The estimator itself predicts with its best iteration by default;
+        # the sidecar records how many boosting rounds that is.
+        meta = {
+            'model_type': self.model_type,
+            'params': self.model_params,
+            'early_stopping_rounds': self.early_stopping_rounds,
+            'early_stopping_fraction': self.early_stopping_fraction,
+            'best_iteration': self.best_iteration_,
+            # On the held-out slice of the training rows, not the evaluation set
+            'best_early_stopping_mlogloss': self.best_score_,
+            'n_trees_trained': self.n_trees_trained_,
+            'n_trees_used': self.n_trees_used_,
+        }
+        with open(os.path.splitext(path)[0] + '.meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"Model saved to {path} ({self.n_trees_used_} boosting rounds used)")
         return path
@@ -5,7 +5,7 @@ try:
 except ImportError:
     from sklearn.externals import joblib
 import os
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -20,9 +20,10 @@ class BaselineModel:
             random_state=config['random_seed']
         )
         
-    def train(self, X_train, y_train):
+    def train(self, X_train, y_train, X_val=None, y_val=None):
         """
         Train the Random Forest baseline model.
+        Accepts dense frames or scipy.sparse matrices (e.g. stacked TF-IDF features).
         """
         logger.info(f"Training Baseline Random Forest with params: {self.model_params}")
         self.model.fit(X_train, y_train)
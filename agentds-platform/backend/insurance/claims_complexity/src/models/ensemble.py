@@ -1,7 +1,8 @@
 from sklearn.ensemble import VotingClassifier
-from src.models.baseline import BaselineModel
-from src.models.advanced import AdvancedModel
-from src.utils.logger import setup_logger
+from .baseline import BaselineModel
+from .advanced import AdvancedModel
+from .stacking import CascadeStackingClassifier
+from ..utils.logger import setup_logger
 import os
 try:
     import joblib
@@ -11,30 +12,66 @@ except ImportError:
 logger = setup_logger(__name__)
 
 class EnsembleModel:
-    def __init__(self, config):
+    """
+    RF + XGB + LGBM ensemble. model.ensemble.mode selects a soft-voting
+    VotingClassifier ('voting') or a CascadeStackingClassifier ('stacking'):
+    out-of-fold probabilities (cached in `oof_store`, a FeatureStore, when
+    given), a meta-learner, and a confidence cascade that skips slower
+    learners at inference.
+    Either way the learners split one thread budget instead of each taking
+    every core.
+    """
+    def __init__(self, config, oof_store=None):
         self.config = config
+        self.oof_store = oof_store
         self.random_seed = config['random_seed']
-        
+        self.params = config['model'].get('ensemble', {})
+        self.mode = self.params.get('mode', 'voting')
+
         # Initialize base models
         self.rf = BaselineModel(config).model
         self.xgb = AdvancedModel(config, 'xgboost').model
         self.lgbm = AdvancedModel(config, 'lightgbm').model
-        
-        self.model = VotingClassifier(
-            estimators=[
-                ('rf', self.rf),
-                ('xgb', self.xgb),
-                ('lgbm', self.lgbm)
-            ],
-            voting='soft',
-            n_jobs=-1
-        )
-        
+        estimators = [
+            ('rf', self.rf),
+            ('xgb', self.xgb),
+            ('lgbm', self.lgbm)
+        ]
+        n_jobs = self.params.get('n_jobs') or os.cpu_count() or 1
+
+        if self.mode == 'stacking':
+            self.model = CascadeStackingClassifier(
+                estimators,
+                n_folds=self.params.get('n_folds', 5),
+                n_jobs=n_jobs,
+                threshold=self.params.get('confidence_threshold', 0.9),
+                C=self.params.get('meta_C', 1.0),
+                random_state=self.random_seed
+            )
+        elif self.mode == 'voting':
+            # Learners fit in parallel, each with its share of the threads
+            for _, estimator in estimators:
+                estimator.set_params(n_jobs=max(1, n_jobs // len(estimators)))
+            self.model = VotingClassifier(
+                estimators=estimators,
+                voting='soft',
+                n_jobs=len(estimators)
+            )
+        else:
+            raise ValueError(f"Unknown ensemble mode: {self.mode}")
+
     def train(self, X_train, y_train, X_val=None, y_val=None):
-        logger.info("Training Ensemble Model (VotingClassifier: RF, XGB, LGBM)...")
-        self.model.fit(X_train, y_train)
+        if self.mode == 'stacking':
+            logger.info("Training Ensemble Model (stacking: RF, XGB, LGBM -> LogisticRegression)...")
+            self.model.fit(X_train, y_train, oof_store=self.oof_store)
+            if X_val is not None and self.model.threshold is not None:
+                logger.info(f"Confidence cascade at threshold {self.model.threshold}: "
+                            f"{self.model.cascade_exit_rate(X_val):.1%} of validation rows skip the full stack")
+        else:
+            logger.info("Training Ensemble Model (VotingClassifier: RF, XGB, LGBM)...")
+            self.model.fit(X_train, y_train)
         logger.info("Ensemble training complete.")
-        
+
     def predict(self, X):
         return self.model.predict(X)
         
@@ -0,0 +1,135 @@
+import copy
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from ..features.sparse import take_rows
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class CascadeStackingClassifier:
+    """
+    Stacked ensemble: base learners' out-of-fold probabilities feed a
+    logistic-regression meta-learner.
+
+    Base learners are fitted concurrently, each with its own slice of the
+    `n_jobs` thread budget instead of every learner asking for all cores.
+    Out-of-fold probabilities can be cached in a FeatureStore (see fit).
+
+    Prediction is a confidence cascade: base learners run fastest first
+    (by per-row latency measured at fit time), and rows on which the
+    average of the learners run so far already reaches `threshold` are
+    answered with that average; only the remaining rows reach the slower
+    learners and the meta-learner. `threshold=None` always runs the full stack.
+    """
+    def __init__(self, estimators, n_folds=5, n_jobs=None, threshold=0.9, C=1.0, random_state=42):
+        self.estimators = estimators
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs
+        self.threshold = threshold
+        self.C = C
+        self.random_state = random_state
+
+    def fit(self, X, y, oof_store=None):
+        """
+        Fit the base learners and the meta-learner. With `oof_store` (a
+        FeatureStore), each learner's out-of-fold probabilities are saved
+        under a key of its parameters and the data, and reused on refits.
+        """
+        y = np.asarray(y)
+        self.classes_ = np.unique(y)
+        budget = self.n_jobs or os.cpu_count() or 1
+        threads = max(1, budget // len(self.estimators))
+        data_key = oof_store.fingerprint_matrix(X) + oof_store.fingerprint_matrix(y) if oof_store else None
+        logger.info(f"Fitting {len(self.estimators)} base learners concurrently with {threads} threads each")
+
+        with ThreadPoolExecutor(max_workers=len(self.estimators), thread_name_prefix='stack') as pool:
+            futures = [pool.submit(self._fit_learner, name, estimator, threads, X, y, oof_store, data_key)
+                       for name, estimator in self.estimators]
+            fitted = [future.result() for future in futures]
+
+        self.names_ = [name for name, _, _, _ in fitted]
+        self.estimators_ = {name: estimator for name, estimator, _, _ in fitted}
+        self.latency_ = {name: latency for name, _, _, latency in fitted}
+        self.order_ = sorted(self.names_, key=self.latency_.get)
+
+        oof = np.hstack([oof for _, _, oof, _ in fitted])
+        self.meta_ = LogisticRegression(C=self.C, max_iter=1000).fit(oof, y)
+        logger.info(f"Stacking fitted; cascade order {self.order_} "
+                    f"(per-row latency ms: {({n: round(t * 1e3, 4) for n, t in self.latency_.items()})})")
+        return self
+
+    def _fit_learner(self, name, estimator, threads, X, y, oof_store, data_key):
+        estimator = clone(estimator).set_params(n_jobs=threads)
+
+        oof, key = None, None
+        if oof_store is not None:
+            params = {k: v for k, v in estimator.get_params().items() if k != 'n_jobs'}
+            key = oof_store.stage_key(f'oof_{name}', {'params': params, 'n_folds': self.n_folds,
+                                                      'random_state': self.random_state}, data_key)
+            if oof_store.exists(f'oof_{name}', key):
+                oof = oof_store.load_value(f'oof_{name}', key)
+
+        start = time.perf_counter()
+        if oof is None:
+            cv = StratifiedKFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_state)
+            oof = cross_val_predict(clone(estimator), X, y, cv=cv, method='predict_proba')
+            if oof_store is not None:
+                oof_store.save_value(f'oof_{name}', key, oof)
+        estimator.fit(X, y)
+
+        sample = take_rows(X, np.arange(min(X.shape[0], 1000)))
+        latency_start = time.perf_counter()
+        estimator.predict_proba(sample)
+        latency = (time.perf_counter() - latency_start) / sample.shape[0]
+        logger.info(f"Base learner {name} fitted in {time.perf_counter() - start:.2f}s")
+        return name, estimator, oof, latency
+
+    def map_estimators(self, fn):
+        """
+        Copy of the fitted ensemble with every base learner replaced by
+        fn(learner), e.g. a compiled tree predictor. The meta-learner is shared.
+        """
+        mapped = copy.copy(self)
+        mapped.estimators_ = {name: fn(estimator) for name, estimator in self.estimators_.items()}
+        return mapped
+
+    def predict_proba(self, X):
+        return self._cascade(X)[0]
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def cascade_exit_rate(self, X):
+        """
+        Share of rows answered before the full stack at the current threshold.
+        """
+        return float(self._cascade(X)[1].mean()) if X.shape[0] else 0.0
+
+    def _cascade(self, X):
+        """Returns (proba, mask of rows answered before the meta-learner)."""
+        n_rows, n_classes = X.shape[0], len(self.classes_)
+        proba = np.empty((n_rows, n_classes))
+        exited = np.zeros(n_rows, dtype=bool)
+        base = {}
+        active = np.arange(n_rows)
+
+        for depth, name in enumerate(self.order_):
+            base[name] = np.zeros((n_rows, n_classes))
+            base[name][active] = self.estimators_[name].predict_proba(take_rows(X, active))
+            if self.threshold is None or depth == len(self.order_) - 1:
+                continue
+            mean = np.mean([base[done][active] for done in self.order_[:depth + 1]], axis=0)
+            confident = mean.max(axis=1) >= self.threshold
+            proba[active[confident]] = mean[confident]
+            exited[active[confident]] = True
+            active = active[~confident]
+            if len(active) == 0:
+                return proba, exited
+
+        proba[active] = self.meta_.predict_proba(np.hstack([base[name][active] for name in self.names_]))
+        return proba, exited
@@ -1,75 +1,241 @@
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import optuna
-from xgboost import XGBClassifier
-from lightgbm import LGBMClassifier
-from sklearn.model_selection import StratifiedKFold, cross_val_score
-from src.utils.logger import setup_logger
+from optuna.trial import TrialState
+import xgboost as xgb
+import lightgbm as lgb
+from sklearn.metrics import f1_score
+from sklearn.model_selection import StratifiedKFold
+from ..features.sparse import take_rows
+from ..utils.config import get_full_path
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
 class HyperparameterTuner:
-    def __init__(self, config, X, y):
+    """
+    Optuna search over XGBoost / LightGBM parameters, scored by macro-F1 CV.
+
+    The fold splits and their native training structures (QuantileDMatrix /
+    binned lgb.Dataset) are built once per study and shared by all trials,
+    which train through xgb.train / lgb.train. Folds run one after another
+    inside a trial and the running mean is reported after each fold, so the
+    MedianPruner can stop a trial that is already behind after its first
+    folds. With `tuning.parallel`, trials run in `n_workers` processes
+    sharing one SQLite-backed study; each worker (and every model it fits)
+    is limited to `threads_per_worker` threads so the pool never
+    oversubscribes the cores; each worker builds the folds once, since the
+    native matrices cannot be shipped between processes. The parallel study
+    is named after the data and search settings, so a rerun resumes it and
+    only runs the trials still missing from n_trials.
+    """
+    def __init__(self, config, X, y, n_jobs=None):
         self.config = config
         self.X = X
-        self.y = y
+        # Native training APIs need labels 0..n_classes-1
+        classes, self.y = np.unique(np.asarray(y), return_inverse=True)
+        self.n_classes = len(classes)
         self.random_seed = config['random_seed']
-        
+        self.params = config.get('tuning', {})
+        self.n_folds = self.params.get('n_folds', 3)
+        self.max_bin = self.params.get('max_bin', 256)
+        self.n_jobs = n_jobs if n_jobs is not None else -1
+        self._folds = {}
+
     def objective_xgboost(self, trial):
+        n_estimators = trial.suggest_int('n_estimators', 100, 1000)
         param = {
-            'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+            'objective': 'multi:softprob',
+            'num_class': self.n_classes,
+            'tree_method': 'hist',
+            'max_bin': self.max_bin,
             'max_depth': trial.suggest_int('max_depth', 3, 10),
             'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
             'subsample': trial.suggest_float('subsample', 0.6, 1.0),
             'colsample_bytree': trial.suggest_float('colsample_bytree', 0.6, 1.0),
-            'random_state': self.random_seed,
-            'n_jobs': -1
+            'seed': self.random_seed,
+            'nthread': self.n_jobs,
+            'verbosity': 0
         }
-        
-        clf = XGBClassifier(**param)
-        
-        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=self.random_seed)
-        scores = cross_val_score(clf, self.X, self.y, cv=cv, scoring='f1_macro')
-        return scores.mean()
+
+        def fit_predict(fold):
+            booster = xgb.train(param, fold['train'], num_boost_round=n_estimators)
+            return booster.predict(fold['val']).argmax(axis=1)
+
+        return self.cross_validate(trial, 'xgboost', fit_predict)
 
     def objective_lightgbm(self, trial):
+        n_estimators = trial.suggest_int('n_estimators', 100, 1000)
         param = {
-            'n_estimators': trial.suggest_int('n_estimators', 100, 1000),
+            'objective': 'multiclass',
+            'num_class': self.n_classes,
             'num_leaves': trial.suggest_int('num_leaves', 20, 300),
             'learning_rate': trial.suggest_float('learning_rate', 0.01, 0.3),
             'feature_fraction': trial.suggest_float('feature_fraction', 0.6, 1.0),
             'bagging_fraction': trial.suggest_float('bagging_fraction', 0.6, 1.0),
             'bagging_freq': trial.suggest_int('bagging_freq', 1, 7),
-            'random_state': self.random_seed,
-            'n_jobs': -1,
+            'seed': self.random_seed,
+            'num_threads': self.n_jobs,
             'verbose': -1
         }
-        
-        clf = LGBMClassifier(**param)
-        
-        cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=self.random_seed)
-        scores = cross_val_score(clf, self.X, self.y, cv=cv, scoring='f1_macro')
-        return scores.mean()
+
+        def fit_predict(fold):
+            booster = lgb.train(param, fold['train'], num_boost_round=n_estimators)
+            return booster.predict(fold['X_val']).argmax(axis=1)
+
+        return self.cross_validate(trial, 'lightgbm', fit_predict)
+
+    def cross_validate(self, trial, model_type, fit_predict):
+        """
+        Macro-F1 over the cached folds, reporting the running mean after each
+        fold and pruning the trial as soon as the pruner says so.
+        """
+        scores = []
+        for fold_idx, fold in enumerate(self.folds(model_type)):
+            y_pred = fit_predict(fold)
+            scores.append(f1_score(fold['y_val'], y_pred, average='macro'))
+
+            trial.report(float(np.mean(scores)), step=fold_idx)
+            if trial.should_prune():
+                raise optuna.TrialPruned(f"Pruned after fold {fold_idx + 1}/{self.n_folds}")
+        return float(np.mean(scores))
+
+    def folds(self, model_type):
+        """
+        Stratified folds with their native training structures, built once
+        and reused by every trial: an XGBoost QuantileDMatrix (features
+        quantized once; the validation matrix shares its cuts) or a
+        constructed LightGBM Dataset (features binned once).
+        """
+        if model_type in self._folds:
+            return self._folds[model_type]
+
+        start = time.perf_counter()
+        cv = StratifiedKFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_seed)
+        folds = []
+        for train_idx, val_idx in cv.split(np.zeros(len(self.y)), self.y):
+            X_train, X_val = take_rows(self.X, train_idx), take_rows(self.X, val_idx)
+            y_train, y_val = self.y[train_idx], self.y[val_idx]
+            fold = {'y_val': y_val}
+            if model_type == 'xgboost':
+                fold['train'] = xgb.QuantileDMatrix(X_train, y_train, max_bin=self.max_bin, nthread=self.n_jobs)
+                fold['val'] = xgb.QuantileDMatrix(X_val, ref=fold['train'], max_bin=self.max_bin, nthread=self.n_jobs)
+            else:
+                fold['train'] = lgb.Dataset(X_train, y_train, params={'max_bin': self.max_bin, 'verbose': -1,
+                                                                      'num_threads': self.n_jobs}).construct()
+                fold['X_val'] = X_val
+            folds.append(fold)
+
+        self._folds[model_type] = folds
+        logger.info(f"Built {self.n_folds} {model_type} folds in {time.perf_counter() - start:.2f}s")
+        return folds
+
+    def objective(self, model_type):
+        if model_type == 'xgboost':
+            return self.objective_xgboost
+        if model_type == 'lightgbm':
+            return self.objective_lightgbm
+        raise ValueError(f"Unknown model type for tuning: {model_type}")
 
     def tune(self, model_type='xgboost', n_trials=20):
-        if len(self.y) < 20 or len(set(self.y)) < 2:
+        if len(self.y) < 20 or self.n_classes < 2:
             logger.warning("Insufficient data for tuning. Returning default parameters.")
             return {}
 
-        logger.info(f"Starting tuning for {model_type} with {n_trials} trials...")
-        
-        study = optuna.create_study(direction='maximize')
-        
+        parallel = self.params.get('parallel', False)
+        logger.info(f"Starting {'parallel ' if parallel else ''}tuning for {model_type} with {n_trials} trials...")
+        start = time.perf_counter()
+
         try:
-            if model_type == 'xgboost':
-                study.optimize(self.objective_xgboost, n_trials=n_trials)
-            elif model_type == 'lightgbm':
-                study.optimize(self.objective_lightgbm, n_trials=n_trials)
+            objective = self.objective(model_type)
+            if parallel:
+                study = self._tune_parallel(model_type, n_trials)
             else:
-                raise ValueError(f"Unknown model type for tuning: {model_type}")
+                study = optuna.create_study(direction='maximize', pruner=self._pruner())
+                study.optimize(objective, n_trials=n_trials)
         except Exception as e:
             logger.error(f"Tuning failed: {e}")
             return {}
-            
+
+        pruned = len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,)))
+        logger.info(f"Tuning finished in {time.perf_counter() - start:.1f}s "
+                    f"({len(study.trials)} trials, {pruned} pruned)")
         logger.info(f"Best trial: {study.best_trial.value}")
         logger.info(f"Best params: {study.best_trial.params}")
-        
+
         return study.best_trial.params
+
+    def _pruner(self):
+        if not self.params.get('pruning', True):
+            return optuna.pruners.NopPruner()
+        # Let a few trials finish before comparing; prune from the first fold on
+        return optuna.pruners.MedianPruner(n_startup_trials=self.params.get('pruning_startup_trials', 3),
+                                           n_warmup_steps=0)
+
+    def _tune_parallel(self, model_type, n_trials):
+        threads = self.params.get('threads_per_worker', 1)
+        n_workers = self.params.get('n_workers') or max(1, (os.cpu_count() or 1) // threads)
+        storage_url = self._storage_url()
+        # Same data and search settings -> same study, so a rerun resumes it instead of adding a new one
+        study_name = self._study_name(model_type)
+        study = optuna.create_study(direction='maximize', pruner=self._pruner(), storage=self._storage(storage_url),
+                                    study_name=study_name, load_if_exists=True)
+        finished = len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE, TrialState.PRUNED)))
+        remaining = max(n_trials - finished, 0)
+        # Fixed per-worker budgets, so the workers run exactly the remaining trials between them
+        budgets = [b for b in (remaining // n_workers + (i < remaining % n_workers) for i in range(n_workers)) if b]
+        logger.info(f"Tuning with {len(budgets)} worker processes x {threads} threads, study {study_name} in "
+                    f"{storage_url} ({finished} trials already run, {remaining} to go)")
+        if not budgets:
+            return study
+
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=len(budgets), mp_context=ctx,
+                                 initializer=_limit_threads, initargs=(threads,)) as pool:
+            futures = [pool.submit(_tuning_worker, self.config, self.X, self.y, model_type,
+                                   study_name, storage_url, budget, threads)
+                       for budget in budgets]
+            for future in futures:
+                future.result()
+        return optuna.load_study(study_name=study_name, storage=self._storage(storage_url), pruner=self._pruner())
+
+    def _study_name(self, model_type):
+        settings = {key: self.params.get(key) for key in ('n_folds', 'max_bin', 'pruning', 'pruning_startup_trials')}
+        digest = hashlib.sha1(json.dumps([model_type, self.random_seed, list(self.X.shape), settings],
+                                         sort_keys=True).encode())
+        digest.update(np.ascontiguousarray(self.y).tobytes())
+        return f"claims-{model_type}-{digest.hexdigest()[:12]}"
+
+    def _storage_url(self):
+        url = self.params.get('storage')
+        if url:
+            return url
+        path = get_full_path(os.path.join(self.config['paths']['outputs'], 'optuna.db'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"sqlite:///{path}"
+
+    @staticmethod
+    def _storage(url):
+        # Several processes write to the same SQLite file: wait for locks instead of failing
+        engine_kwargs = {'connect_args': {'timeout': 60}} if url.startswith('sqlite') else {}
+        return optuna.storages.RDBStorage(url, engine_kwargs=engine_kwargs)
+
+def _limit_threads(threads):
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+def _tuning_worker(config, X, y, model_type, study_name, storage_url, n_trials, threads):
+    """
+    Worker process: run `n_trials` trials of the shared study.
+    """
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    tuner = HyperparameterTuner(config, X, y, n_jobs=threads)
+    study = optuna.load_study(study_name=study_name, storage=tuner._storage(storage_url), pruner=tuner._pruner())
+    study.optimize(tuner.objective(model_type), n_trials=n_trials)
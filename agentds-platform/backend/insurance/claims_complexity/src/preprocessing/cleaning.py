@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
@@ -8,33 +8,51 @@ class DataCleaner:
     def __init__(self, config):
         self.config = config
         
-    def handle_missing_values(self, df):
+    def fit_missing_values(self, df):
         """
-        Handle missing values in the dataframe.
-        - Numeric: Median imputation
-        - Categorical: Mode imputation or 'Unknown'
+        Learn imputation values from the training frame.
+        - Numeric: median
+        - Categorical: mode, or 'Unknown' if the column is entirely missing
+        Returns a {column: fill_value} dict usable by handle_missing_values.
         """
-        df = df.copy()
+        fill_values = {}
         
-        # Numeric columns
         numeric_cols = df.select_dtypes(include=[np.number]).columns
+        medians = df[numeric_cols].median()
         for col in numeric_cols:
-            if df[col].isnull().any():
-                median_val = df[col].median()
-                df[col] = df[col].fillna(median_val)
-                logger.info(f"Imputed missing values in numeric column {col} with median: {median_val}")
+            if pd.notnull(medians[col]):
+                fill_values[col] = medians[col]
                 
-        # Categorical columns
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
         for col in categorical_cols:
-            if df[col].isnull().any():
-                mode_val = df[col].mode()
-                if not mode_val.empty:
-                    df[col] = df[col].fillna(mode_val[0])
-                    logger.info(f"Imputed missing values in categorical column {col} with mode: {mode_val[0]}")
-                else:
-                    df[col] = df[col].fillna('Unknown')
-                    logger.info(f"Imputed missing values in categorical column {col} with 'Unknown'")
+            mode_val = df[col].mode()
+            fill_values[col] = mode_val[0] if not mode_val.empty else 'Unknown'
+            
+        return fill_values
+
+    def handle_missing_values(self, df, fill_values=None):
+        """
+        Handle missing values in the dataframe.
+        - Numeric: Median imputation
+        - Categorical: Mode imputation or 'Unknown'
+        If `fill_values` (from fit_missing_values) is given, those learned values are
+        applied in a single fillna instead of being recomputed on df.
+        """
+        df = df.copy()
+        
+        if fill_values is None:
+            fill_values = self.fit_missing_values(df)
+            
+        missing = df.columns[df.isnull().any()]
+        to_fill = {col: fill_values[col] for col in missing if col in fill_values}
+        if to_fill:
+            for col, val in to_fill.items():
+                # A categorical can only be filled with one of its categories
+                if isinstance(df[col].dtype, pd.CategoricalDtype) and val not in df[col].cat.categories:
+                    df[col] = df[col].cat.add_categories([val])
+            df = df.fillna(value=to_fill)
+            for col, val in to_fill.items():
+                logger.info(f"Imputed missing values in column {col} with: {val}")
                     
         return df
 
@@ -1,5 +1,5 @@
 import pandas as pd
-from src.utils.logger import setup_logger
+from ..utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
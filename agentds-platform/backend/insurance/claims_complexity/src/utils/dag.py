@@ -0,0 +1,138 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class Stage:
+    def __init__(self, name, fn, inputs, outputs, params, cache):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params
+        self.cache = cache
+
+class StageGraph:
+    """
+    Declarative graph of pipeline stages, memoized in a FeatureStore.
+
+    A stage declares the named values it reads (`inputs`) and produces
+    (`outputs`). Its key hashes its name, its config `params` and the keys
+    of the stages producing its inputs, so a change anywhere only changes
+    the keys downstream of it. `run(targets)` works backwards from the
+    targets: an output already in the store is loaded, anything else is
+    recomputed together with whatever it needs. Stages whose inputs are
+    ready run concurrently on a thread pool.
+
+    Sources are external inputs (e.g. raw files): a loader function plus a
+    caller-supplied fingerprint key; they are only loaded if a stage that
+    needs them actually runs. Stages with `cache=False` (cheap steps and
+    side effects like writing a submission) always run when needed.
+    """
+    def __init__(self, store, max_workers=4):
+        self.store = store
+        self.max_workers = max_workers
+        self._stages = {}
+        self._producers = {}
+        self._keys = {}
+
+    def source(self, name, loader, key):
+        self._add(Stage(name, loader, [], [name], None, cache=False))
+        self._keys[name] = key
+
+    def stage(self, name, fn, inputs=(), outputs=None, params=None, cache=True):
+        """
+        Register `fn(*inputs)`. With several outputs, fn returns a tuple in `outputs` order.
+        """
+        self._add(Stage(name, fn, inputs, outputs or [name], params, cache))
+
+    def key(self, stage_name):
+        if stage_name not in self._keys:
+            stage = self._stages[stage_name]
+            parents = [self.key(self._producers[value]) for value in stage.inputs]
+            self._keys[stage_name] = self.store.stage_key(stage_name, stage.params, *parents)
+        return self._keys[stage_name]
+
+    def run(self, targets):
+        """
+        Produce the `targets` outputs, reusing stored results where possible.
+        Returns {output: value}.
+        """
+        start = time.perf_counter()
+        tasks = {}
+        for target in targets:
+            self._plan(target, tasks)
+        run_stages = [t[1] for t in tasks if t[0] == 'run']
+        loads = [t[1] for t in tasks if t[0] == 'load']
+        logger.info(f"Stage graph: running {run_stages or 'nothing'}; loading {loads or 'nothing'} from the store")
+
+        values = {}
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='stage') as pool:
+            while len(done) < len(tasks):
+                for task, deps in tasks.items():
+                    if task not in done and task not in running.values() and deps <= done:
+                        running[pool.submit(self._execute, task, values)] = task
+                if not running:
+                    raise RuntimeError(f"Stage graph has a cycle among {[t for t in tasks if t not in done]}")
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    try:
+                        values.update(future.result())
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        logger.error(f"Stage graph failed in {task[0]} {task[1]}")
+                        raise
+                    done.add(task)
+
+        logger.info(f"Stage graph finished in {time.perf_counter() - start:.2f}s")
+        return {target: values[target] for target in targets}
+
+    def _add(self, stage):
+        if stage.name in self._stages:
+            raise ValueError(f"Stage {stage.name} is already defined")
+        for output in stage.outputs:
+            if output in self._producers:
+                raise ValueError(f"Output {output} is already produced by {self._producers[output]}")
+            self._producers[output] = stage.name
+        self._stages[stage.name] = stage
+
+    def _plan(self, output, tasks):
+        """Adds the task yielding `output` (and its dependencies) to tasks; returns that task."""
+        if output not in self._producers:
+            raise KeyError(f"No stage produces {output}")
+        stage = self._stages[self._producers[output]]
+        key = self.key(stage.name)
+
+        if stage.cache and self.store.exists(output, key):
+            task = ('load', output)
+            tasks.setdefault(task, set())
+            return task
+
+        task = ('run', stage.name)
+        if task not in tasks:
+            tasks[task] = set()
+            tasks[task] = {self._plan(value, tasks) for value in stage.inputs}
+        return task
+
+    def _execute(self, task, values):
+        kind, name = task
+        if kind == 'load':
+            stage_name = self._producers[name]
+            return {name: self.store.load_value(name, self.key(stage_name))}
+
+        stage = self._stages[name]
+        start = time.perf_counter()
+        result = stage.fn(*[values[value] for value in stage.inputs])
+        results = dict(zip(stage.outputs, result if len(stage.outputs) > 1 else [result]))
+        logger.info(f"Stage {name} ran in {time.perf_counter() - start:.2f}s")
+
+        if stage.cache:
+            key = self.key(name)
+            for output, value in results.items():
+                self.store.save_value(output, key, value)
+        return results
@@ -1,6 +1,11 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from backend.common.logging.logger import setup_logger
+from backend.common.utils.jobs import training_jobs
+from backend.common.utils.lifecycle import service_registry
 
 # Import Domain Routers
 # NOTE: Add new domain imports here as they are developed.
@@ -17,7 +22,21 @@ from backend.healthcare.router import router as healthcare_router
 
 logger = setup_logger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Preloads and warms up every registered model in the background, so the
+    first request after a deploy does not pay the cold start. /ready reports
+    progress; /health is live immediately.
+    """
+    preload = asyncio.create_task(asyncio.to_thread(service_registry.preload_all))
+    yield
+    training_jobs.shutdown()
+    if not preload.done():
+        await preload
+
 app = FastAPI(
+    lifespan=lifespan,
     title="AgentDS Platform API",
     description="Unified Analytics Platform for Insurance, Healthcare, Manufacturing, and more.",
     version="1.0.0",
@@ -44,6 +63,19 @@ async def root_health():
     """global health check for the entire platform."""
     return {"status": "active", "platform": "AgentDS"}
 
+@app.get("/ready")
+async def readiness():
+    """readiness check: which models are loaded and how long each took."""
+    status_code = 200 if service_registry.ready else 503
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "ready": service_registry.ready,
+            "preload_complete": service_registry.preload_complete,
+            "models": service_registry.status(),
+        },
+    )
+
 # -----------------------------------------------------------------------------
 # DOMAIN ROUTER REGISTRATION
 # -----------------------------------------------------------------------------